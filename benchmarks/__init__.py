@@ -0,0 +1,9 @@
+"""
+Benchmarks of the infection package hot paths.
+
+Each `bench_*` module holds benchmark classes, in the style of asv
+(airspeed velocity): a class has `params` (a list of parameter value lists)
+and `param_names`, an optional `setup()` and `teardown()`, run around each
+measurement with the same parameters, and `time_*()` methods, the
+benchmarks themselves. See `python -m benchmarks --help`.
+"""
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# vim: ts=8 et sw=4 sts=4
+"""
+Run the infection benchmarks, reporting wall time and peak memory of each
+benchmark and parameter combination.
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import time
+import tracemalloc
+from importlib.metadata import PackageNotFoundError, version
+
+# benchmarks never show windows
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+
+def discover(pattern: str = ''):
+    """
+    Generate benchmarks, in module and definition order.
+
+    Parameters:
+        * pattern (str): if not empty, generate only benchmarks whose name
+          contains pattern
+
+    Yields:
+        * tuple: benchmark name (str), class and method name (str)
+    """
+    package = os.path.dirname(os.path.abspath(__file__))
+    for info in sorted(pkgutil.iter_modules([package]),
+            key=lambda info: info.name):
+        if not info.name.startswith('bench_'):
+            continue
+        module = importlib.import_module('%s.%s' % (__package__, info.name))
+        classes = [cls for _, cls in inspect.getmembers(module,
+                   inspect.isclass) if cls.__module__ == module.__name__]
+        classes.sort(key=lambda cls: inspect.getsourcelines(cls)[1])
+        for cls in classes:
+            methods = [name for name, _ in inspect.getmembers(cls,
+                       inspect.isfunction) if name.startswith('time_')]
+            methods.sort(key=lambda name:
+                    inspect.getsourcelines(getattr(cls, name))[1])
+            for method in methods:
+                name = '%s.%s.%s' % (info.name[len('bench_'):],
+                        cls.__name__, method)
+                if pattern in name:
+                    yield name, cls, method
+
+
+def measure(cls, method: str, params: tuple, repeat: int) -> dict:
+    """
+    Run a benchmark, calling setup and teardown around each run.
+
+    Timed runs come first; a last run is traced with tracemalloc, which
+    slows it down, to find the peak memory allocated during the call
+    (Python objects and NumPy arrays), setup excluded.
+
+    Parameters:
+        * cls (type): benchmark class
+        * method (str): benchmark method name
+        * params (tuple): parameter values
+        * repeat (int): number of timed runs
+
+    Returns:
+        * dict: best and median wall time, in seconds, and peak memory, in
+          bytes
+    """
+    def run(traced: bool):
+        bench = cls()
+        if hasattr(bench, 'setup'):
+            bench.setup(*params)
+        try:
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            getattr(bench, method)(*params)
+            elapsed = time.perf_counter() - start
+            if traced:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                return peak
+            return elapsed
+        finally:
+            if hasattr(bench, 'teardown'):
+                bench.teardown(*params)
+
+    times = sorted(run(False) for _ in range(repeat))
+    return {
+        'time': times[0],
+        'median': times[len(times) // 2],
+        'peak': run(True)
+    }
+
+
+def combinations(cls, quick: bool = False) -> list:
+    """
+    Return the parameter combinations of a benchmark class.
+
+    Parameters:
+        * cls (type): benchmark class
+        * quick (bool): if True, use only the first value of each parameter
+    """
+    params = getattr(cls, 'params', [])
+    if params and not isinstance(params[0], (list, tuple)):
+        # single parameter
+        params = [params]
+    if quick:
+        params = [values[:1] for values in params]
+    return list(itertools.product(*params))
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '%.3g%s' % (seconds / scale, unit)
+    return '%.3gns' % (seconds * 1e9)
+
+
+def format_size(size: int) -> str:
+    for unit, scale in (('GiB', 2**30), ('MiB', 2**20), ('KiB', 2**10)):
+        if size >= scale:
+            return '%.3g%s' % (size / scale, unit)
+    return '%dB' % size
+
+
+def environment() -> dict:
+    """Return versions of Python and of the main dependencies."""
+    env = {'python': platform.python_version(),
+           'machine': platform.machine()}
+    for name in ('infection', 'networkx', 'numpy', 'matplotlib'):
+        try:
+            env[name] = version(name)
+        except PackageNotFoundError:
+            env[name] = None
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(prog=__package__, description=__doc__)
+    # benchmark filter
+    parser.add_argument('-k', '--filter', metavar='PATTERN',
+            help="""Run only benchmarks whose name contains PATTERN, e.g.
+            'simulation' or 'Timeline'.""", type=str, default='')
+    # list benchmarks only
+    parser.add_argument('-l', '--list',
+            help="""List benchmarks and their parameters, without running
+            them.""", action='store_true')
+    # smallest parameters only
+    parser.add_argument('-q', '--quick',
+            help="""Use only the first value of each parameter, i.e. the
+            smallest graphs.""", action='store_true')
+    # timed runs
+    parser.add_argument('-r', '--repeat', metavar='NUM',
+            help="""Time each benchmark NUM times, and report the best and
+            median time. By default, NUM is 3.""", type=int, default=3)
+    # save results
+    parser.add_argument('-o', '--output', metavar='FILE',
+            help="""Save results to FILE, as JSON, along with Python and
+            dependency versions.""", type=str, default=None)
+    # compare with saved results
+    parser.add_argument('-c', '--compare', metavar='FILE',
+            help="""Compare results with the ones saved in FILE by
+            '--output': print the ratio of best times and of peak
+            memory (new / old).""", type=argparse.FileType(), default=None)
+    # parse sys.argv
+    args = parser.parse_args()
+
+    # check args ranges
+    if args.repeat < 1:
+        parser.error("repeat: NUM must be a positive integer")
+
+    baseline = {}
+    if args.compare:
+        with args.compare as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    if not args.list:
+        header = ['benchmark', 'best', 'median', 'peak']
+        if baseline:
+            header += ['time-ratio', 'peak-ratio']
+        print(*header, sep='\t', flush=True)
+    for name, cls, method in discover(args.filter):
+        param_names = getattr(cls, 'param_names', [])
+        for params in combinations(cls, args.quick):
+            label = ', '.join('%s=%s' % item
+                              for item in zip(param_names, params))
+            if args.list:
+                print(name, label, sep='\t')
+                continue
+            key = '%s(%s)' % (name, label)
+            result = measure(cls, method, params, args.repeat)
+            results[key] = result
+            row = [key, format_time(result['time']),
+                   format_time(result['median']),
+                   format_size(result['peak'])]
+            if key in baseline:
+                old = baseline[key]
+                row += ['x%.2f' % (result['time'] / old['time']),
+                        'x%.2f' % (result['peak'] / max(old['peak'], 1))]
+            print(*row, sep='\t', flush=True)
+
+    if args.output and not args.list:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results},
+                    f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Graph generation, from every template."""
+
+from infection.generation import Factory
+
+from .common import DEGREES, SIZES, SEED, seed_all, template_kwargs
+
+
+class Build:
+
+    params = [[*Factory.Template.__members__], SIZES, DEGREES]
+    param_names = ['template', 'nodes', 'degree']
+
+    def setup(self, template, nodes, degree):
+        seed_all()
+        self.factory = Factory()
+        self.template = Factory.Template[template]
+        self.kwargs = template_kwargs(self.template, nodes, degree)
+
+    def time_build(self, template, nodes, degree):
+        # networkx graph
+        self.factory.build(self.template, **self.kwargs)
+
+    def time_build_csr(self, template, nodes, degree):
+        # compiled graph, without networkx
+        self.factory.build_csr(self.template, SEED, **self.kwargs)
@@ -0,0 +1,95 @@
+"""Graph loading and evolution serialization, as done by the CLI."""
+
+import os
+import shutil
+import tempfile
+
+import networkx as nx
+
+from infection import storage
+from infection.csr import load_graph
+from infection.simulation import Engine
+from infection.simulation.__main__ import make_evolution
+
+from .common import DEGREES, SIZES, SEED, make_graph, make_zeroes, \
+        run_evolution
+
+
+def _save_graph(directory: str, nodes: int, degree: int) -> str:
+    graph_uid = storage.save_graph(
+            make_graph(nodes, degree).generate_adjlist(), directory)
+    return os.path.join(directory, graph_uid + '.adjlist')
+
+
+class LoadGraph:
+
+    params = [SIZES, DEGREES]
+    param_names = ['nodes', 'degree']
+
+    def setup(self, nodes, degree):
+        self.dir = tempfile.mkdtemp()
+        self.path = _save_graph(self.dir, nodes, degree)
+        with open(self.path) as f:
+            self.lines = f.readlines()
+
+    def teardown(self, nodes, degree):
+        shutil.rmtree(self.dir)
+
+    def time_parse_adjlist(self, nodes, degree):
+        # graph file given with '-G'
+        nx.parse_adjlist(self.lines)
+
+    def time_load_graph(self, nodes, degree):
+        # graph given by UID, compiled on first use
+        load_graph(self.path)
+
+
+class LoadCachedGraph:
+
+    params = [SIZES, DEGREES]
+    param_names = ['nodes', 'degree']
+
+    def setup(self, nodes, degree):
+        self.dir = tempfile.mkdtemp()
+        self.path = _save_graph(self.dir, nodes, degree)
+        load_graph(self.path)
+
+    def teardown(self, nodes, degree):
+        shutil.rmtree(self.dir)
+
+    def time_load_graph(self, nodes, degree):
+        # graph given by UID, memory-mapped from the compiled graph cache
+        load_graph(self.path)
+
+
+class SaveEvolution:
+
+    params = [[*storage.Format.__members__], SIZES]
+    param_names = ['format', 'nodes']
+
+    def setup(self, fmt, nodes):
+        self.dir = tempfile.mkdtemp()
+        self.fmt = storage.Format[fmt]
+        self.graph = make_graph(nodes, 4)
+        self.rounds = run_evolution(self.graph, Engine.ARRAY, 'SIR')
+        self.uid = storage.save_evolution(self.graph.name, .5, self.rounds,
+                self.dir, self.fmt, self.graph.labels)
+
+    def teardown(self, fmt, nodes):
+        shutil.rmtree(self.dir)
+
+    def time_make_evolution(self, fmt, nodes):
+        # simulation and serialization, as with '--save'
+        make_evolution(self.graph, make_zeroes(self.graph), .5, save=True,
+                evolution_dir=self.dir, engine=Engine.ARRAY, seed=SEED,
+                fmt=self.fmt)
+
+    def time_save_evolution(self, fmt, nodes):
+        storage.save_evolution(self.graph.name, .5, self.rounds, self.dir,
+                self.fmt, self.graph.labels)
+
+    def time_load_evolution(self, fmt, nodes):
+        # load, then read every round
+        _, rounds = storage.find_evolution(self.dir, self.uid)
+        for _ in rounds:
+            pass
@@ -0,0 +1,20 @@
+"""Evolutions, for every engine and model variant."""
+
+from infection.simulation import Engine
+
+from .common import DEGREES, SIZES, VARIANTS, make_graph, run_evolution
+
+
+class Evolve:
+
+    params = [[*Engine.__members__], [*VARIANTS], SIZES, DEGREES]
+    param_names = ['engine', 'variant', 'nodes', 'degree']
+
+    def setup(self, engine, variant, nodes, degree):
+        self.engine = Engine[engine]
+        self.graph = make_graph(nodes, degree)
+        if not self.engine.value['compiled']:
+            self.graph = self.graph.to_networkx()
+
+    def time_evolution(self, engine, variant, nodes, degree):
+        run_evolution(self.graph, self.engine, variant)
@@ -0,0 +1,77 @@
+"""
+Command line startup, in a fresh interpreter each time; every benchmark
+fails if a heavy dependency is imported where it is not needed.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from infection import storage
+
+from .common import make_graph
+
+
+# heavy dependencies, never needed by these commands
+_HEAVY = ['matplotlib', 'scipy']
+
+# import a module, or run it as a script if given arguments, then report
+# which heavy modules were imported
+_PROBE = """
+import importlib, runpy, sys
+sys.argv, status = sys.argv[1:], 0
+if len(sys.argv) == 1:
+    importlib.import_module(sys.argv[0])
+else:
+    try:
+        runpy.run_module(sys.argv[0], run_name='__main__', alter_sys=True)
+    except SystemExit as e:
+        status = e.code
+sys.stdout.flush()
+sys.stderr.write('imported: %s\\n' % ' '.join(
+        name for name in {heavy!r} if name in sys.modules))
+sys.exit(status)
+""".format(heavy=_HEAVY)
+
+
+def _probe(module: str, *args, cwd: str = None):
+    # run the command, and fail if it imports any heavy module
+    result = subprocess.run([sys.executable, '-c', _PROBE, module, *args],
+            cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            text=True, check=True)
+    imported = result.stderr.rstrip('\n').rpartition('\n')[2]
+    if imported != 'imported: ':
+        raise AssertionError('%s %s: %s' % (module, ' '.join(args),
+                imported))
+
+
+class Startup:
+
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        graph_dir = os.path.join(self.dir, 'graphs')
+        os.mkdir(graph_dir)
+        self.graph_uid = storage.save_graph(
+                make_graph(64, 4).generate_adjlist(), graph_dir)
+
+    def teardown(self):
+        shutil.rmtree(self.dir)
+
+    def time_import(self):
+        _probe('infection')
+
+    def time_simulation_help(self):
+        _probe('infection.simulation', '--help')
+
+    def time_simulation_run(self):
+        # small run, as in shell-driven sweeps
+        _probe('infection.simulation', '-g', self.graph_uid, '-p', '.5',
+                '-s', '1', '--seed', '0', '--save', cwd=self.dir)
+
+    def time_generation_run(self):
+        _probe('infection.generation', 'CYCLE', '-n', '64')
+
+    def time_visualization_help(self):
+        _probe('infection.visualization', '--help')
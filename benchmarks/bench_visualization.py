@@ -0,0 +1,53 @@
+"""Timeline rendering and animation frames."""
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from infection.generation import Factory
+from infection.rounds import state_array
+from infection.simulation import Engine
+from infection.visualization import Animation2D, Layout, Timeline
+
+from .common import SIZES, SEED, run_evolution, template_kwargs
+
+
+def _torus(nodes: int):
+    # torus graphs have a closed-form layout, so setup is quick
+    template = Factory.Template.TORUS
+    return Factory().build_csr(template, SEED,
+            **template_kwargs(template, nodes, 4))
+
+
+class RenderTimeline:
+
+    params = [SIZES, [None, 80]]
+    param_names = ['nodes', 'width']
+
+    def setup(self, nodes, width):
+        self.graph = _torus(nodes)
+        self.rounds = run_evolution(self.graph, Engine.ARRAY, 'SIR')
+
+    def time_timeline(self, nodes, width):
+        for _ in Timeline(self.graph.labels, self.rounds, width=width):
+            pass
+
+
+class AnimationFrame:
+
+    params = [SIZES]
+    param_names = ['nodes']
+
+    def setup(self, nodes):
+        graph = _torus(nodes)
+        rounds = run_evolution(graph, Engine.ARRAY, 'SIR')
+        self.animation = Animation2D(graph.to_networkx(), rounds,
+                Layout.TORUS, show=False)
+        FigureCanvasAgg(self.animation.fig).draw()
+        index = {label: k for k, label in enumerate(graph.labels)}
+        self.frame = (len(rounds) // 2,
+                state_array(rounds[len(rounds) // 2], index))
+
+    def time_frame(self, nodes):
+        # update node colors, then redraw the changed artists, as blitting
+        # does
+        for artist in self.animation.__update__(self.frame):
+            self.animation.ax.draw_artist(artist)
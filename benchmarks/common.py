@@ -0,0 +1,90 @@
+"""
+Graphs and evolutions shared by the benchmarks; all of them are seeded, so
+that every run measures the same work.
+"""
+
+import itertools
+import math
+import random
+
+import numpy as np
+
+from infection.generation import Factory
+from infection.rounds import Rounds
+from infection.simulation import Engine
+
+
+# number of graph nodes
+SIZES = [256, 1024, 4096]
+
+# mean node degree, for templates with random edges
+DEGREES = [4, 16]
+
+# evolution variants: infection and recovery duration
+VARIANTS = {
+    'SIR': (1, None),
+    'SIRS': (1, 2),
+    'LONG-INFECTION': (8, None)
+}
+
+# rounds computed at most, as SIRS evolutions may never end
+MAX_ROUNDS = 200
+
+SEED = 42
+
+
+def seed_all():
+    """Seed the global random generators, used by networkx builders."""
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+
+def template_kwargs(template: Factory.Template, nodes: int,
+        degree: int) -> dict:
+    """
+    Return template variables for a graph with about the given number of
+    nodes and mean degree.
+    """
+    side = max(int(math.isqrt(nodes)), 1)
+    values = {
+        'nodes': nodes,
+        'columns': side,
+        'rows': side,
+        'probability': min(degree / max(nodes - 1, 1), 1.)
+    }
+    return {var: values[var] for var in template.value['vars']}
+
+
+def make_graph(nodes: int, degree: int):
+    """
+    Return a connected compiled graph: a cycle plus random edges, with the
+    given mean degree.
+    """
+    template = Factory.Template.CYCLE_U_ERDOS_RENYI
+    graph = Factory().build_csr(template, SEED,
+            **template_kwargs(template, nodes, max(degree - 2, 0)))
+    graph.name = 'bench-%d-%d' % (nodes, degree)
+    return graph
+
+
+def make_zeroes(graph, count: int = 4) -> list:
+    """Return initially infectious nodes, spread over the graph."""
+    labels = graph.labels if hasattr(graph, 'labels') else [*graph]
+    return labels[::max(len(labels) // count, 1)][:count]
+
+
+def run_evolution(graph, engine: Engine, variant: str,
+        probability: float = .5):
+    """
+    Compute an evolution, one round at a time, up to `MAX_ROUNDS` rounds.
+
+    Returns:
+        * Rounds: evolution rounds
+    """
+    infection, recovery = VARIANTS[variant]
+    evolution = engine.value['class'](graph, make_zeroes(graph),
+            probability, infection, recovery, SEED, lazy=True)
+    rounds = Rounds(evolution.zeroes)
+    for delta in itertools.islice(evolution.transitions(), MAX_ROUNDS):
+        rounds.append(*delta)
+    return rounds
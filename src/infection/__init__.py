@@ -1,3 +1,11 @@
-from .generation import *
-from .simulation import *
-from .visualization import *
+from . import generation, simulation, visualization
+from ._lazy import attach
+
+
+# names exported by the subpackages, imported on first use: importing
+# `infection` imports neither matplotlib nor scipy
+__getattr__, __dir__, __all__ = attach(__name__, {
+    name: subpackage.__name__.rpartition('.')[2]
+    for subpackage in (generation, simulation, visualization)
+    for name in subpackage.__all__
+})
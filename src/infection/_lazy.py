@@ -0,0 +1,34 @@
+import importlib
+
+
+def attach(package: str, exports: dict):
+    """
+    Export names of a package lazily: each name is imported from its module
+    on first access, through the module level `__getattr__()` of the
+    package (PEP 562). So, importing the package costs nothing, and heavy
+    dependencies (e.g. matplotlib, scipy) are imported only by the modules
+    actually used.
+
+    Parameters:
+        * package (str): package name, i.e. `__name__` of the package
+        * exports (dict): module name, relative to the package, by exported
+          name
+
+    Returns:
+        * tuple: `__getattr__()` and `__dir__()` functions, and `__all__`
+          list, to be assigned in the package namespace
+    """
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError("module '%s' has no attribute '%s'" %
+                    (package, name))
+        module = importlib.import_module('.' + exports[name], package)
+        value = getattr(module, name)
+        # later accesses skip __getattr__
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__():
+        return sorted({*vars(importlib.import_module(package)), *exports})
+
+    return __getattr__, __dir__, [*exports]
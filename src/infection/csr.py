@@ -0,0 +1,265 @@
+import os
+from multiprocessing import shared_memory
+
+import networkx as nx
+import numpy as np
+
+from . import storage
+from . import util
+
+
+# bump when the compiled graph layout changes, to invalidate old caches
+_CACHE_VERSION = 1
+
+
+class CSRGraph:
+
+    def __init__(self, labels: list, indptr: np.ndarray, indices: np.ndarray,
+            name: str = ''):
+        """
+        Graph compiled into compressed sparse row (CSR) arrays.
+
+        Nodes are mapped to contiguous integer indices; the neighbors of the
+        node with index `k` are `indices[indptr[k]:indptr[k+1]]`.
+
+        Parameters:
+            * labels (list): node labels, sorted by node index
+            * indptr (numpy.ndarray): row pointers, of size `len(labels) + 1`
+            * indices (numpy.ndarray): neighbor indices, row after row
+            * name (str): graph name (i.e. graph UID)
+
+        Attributes:
+            * name (str): graph name
+            * labels (list): node labels, sorted by node index
+            * index (dict): node indices, by node label
+            * indptr (numpy.ndarray): int32 row pointers
+            * indices (numpy.ndarray): int32 neighbor indices
+        """
+        self.name = name
+        self.labels = labels
+        self.index = {label: k for k, label in enumerate(labels)}
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+
+    @classmethod
+    def from_networkx(cls, graph: nx.Graph):
+        """
+        Compile a networkx graph; node indices follow the graph iteration
+        order and neighbors keep the graph adjacency order.
+        """
+        labels = list(graph)
+        index = {label: k for k, label in enumerate(labels)}
+        indptr = np.zeros(len(labels) + 1, dtype=np.int32)
+        indptr[1:] = np.cumsum([len(graph.adj[u]) for u in labels])
+        indices = np.fromiter(
+                (index[v] for u in labels for v in graph.adj[u]),
+                dtype=np.int32, count=int(indptr[-1]))
+        return cls(labels, indptr, indices, graph.name)
+
+    @classmethod
+    def from_edges(cls, nodes: int, edges: np.ndarray, name: str = ''):
+        """
+        Compile an undirected graph from an edge array, without building a
+        networkx graph; nodes are labelled from 0 to `nodes - 1`, and the
+        neighbors of each node keep the edge array order.
+
+        Parameters:
+            * nodes (int): number of nodes
+            * edges (numpy.ndarray): node pairs, with shape (edges, 2); each
+              edge must appear once, in either direction
+            * name (str): graph name (i.e. graph UID)
+        """
+        edges = np.asarray(edges).reshape(-1, 2)
+        loops = edges[:, 0] == edges[:, 1]
+        # each edge in both directions, self-loops once
+        heads = np.concatenate((edges[:, 0], edges[~loops, 1]))
+        tails = np.concatenate((edges[:, 1], edges[~loops, 0]))
+        order = np.argsort(heads, kind='stable')
+        indptr = np.zeros(nodes + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(heads, minlength=nodes))
+        return cls(list(range(nodes)), indptr, tails[order], name)
+
+    @classmethod
+    def attach(cls, descriptor: dict):
+        """
+        Attach to a graph shared by the parent process, without copying its
+        arrays; see `share()`.
+
+        Parameters:
+            * descriptor (dict): shared graph descriptor
+
+        Returns:
+            * tuple: attached graph and its shared memory block; the block
+              must be kept alive as long as the graph is in use
+        """
+        shm = shared_memory.SharedMemory(descriptor['shm'])
+        size = len(descriptor['labels'])
+        indptr = np.ndarray(size + 1, dtype=np.int32, buffer=shm.buf)
+        indices = np.ndarray(descriptor['edges'], dtype=np.int32,
+                buffer=shm.buf, offset=indptr.nbytes)
+        return cls(descriptor['labels'], indptr, indices,
+                descriptor['name']), shm
+
+    def share(self):
+        """
+        Copy graph arrays to a new shared memory block, so that other
+        processes can attach to them; see `attach()`.
+
+        Returns:
+            * tuple: shared graph descriptor (dict) and shared memory block;
+              the caller must close and unlink the block when done
+        """
+        size = self.indptr.nbytes + self.indices.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        indptr = np.ndarray(self.indptr.shape, dtype=np.int32, buffer=shm.buf)
+        indices = np.ndarray(self.indices.shape, dtype=np.int32,
+                buffer=shm.buf, offset=indptr.nbytes)
+        indptr[:] = self.indptr
+        indices[:] = self.indices
+        descriptor = {
+            'shm': shm.name,
+            'name': self.name,
+            'labels': self.labels,
+            'edges': len(self.indices)
+        }
+        return descriptor, shm
+
+    def relabel(self, mapping: dict):
+        """
+        Return a copy of the graph with nodes relabelled; nodes missing from
+        mapping keep their label. Nodes mapped to the same label are merged,
+        as `networkx.relabel_nodes()` does.
+
+        Parameters:
+            * mapping (dict): new node labels, by old node label
+        """
+        labels = [mapping.get(label, label) for label in self.labels]
+        if len(set(labels)) < len(labels):
+            return CSRGraph.from_networkx(
+                    nx.relabel_nodes(self.to_networkx(), mapping))
+        return CSRGraph(labels, self.indptr, self.indices, self.name)
+
+    def to_networkx(self) -> nx.Graph:
+        """
+        Return the graph as a networkx graph, with the same node order and
+        adjacency order.
+        """
+        graph = nx.Graph(name=self.name)
+        graph.add_nodes_from(self.labels)
+        labels = self.labels
+        for k, u in enumerate(labels):
+            row = self.indices[self.indptr[k]:self.indptr[k + 1]].tolist()
+            graph.add_edges_from((u, labels[j]) for j in row)
+        return graph
+
+    def generate_adjlist(self):
+        """
+        Generate adjacency list lines, the same as
+        `networkx.generate_adjlist()` over `to_networkx()`: each edge is
+        listed once, on the line of the node coming first.
+
+        Yields:
+            * str: node label followed by the labels of its neighbors not
+              listed before, separated by spaces
+        """
+        labels, indptr = self.labels, self.indptr.tolist()
+        for k, label in enumerate(labels):
+            row = self.indices[indptr[k]:indptr[k + 1]]
+            yield ' '.join(map(str, [label] +
+                    [labels[j] for j in row[row >= k].tolist()]))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self.index
+
+    def degree(self) -> np.ndarray:
+        """Return the degree of each node, by node index."""
+        return np.diff(self.indptr)
+
+    def neighbors(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        Return the neighbors of all the given nodes, concatenated.
+
+        Parameters:
+            * nodes (numpy.ndarray): node indices
+
+        Returns:
+            * numpy.ndarray: neighbor indices; a node adjacent to more than
+              one of the given nodes is repeated accordingly
+        """
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        total = int(counts.sum())
+        # position of each neighbor in `indices`: a run of consecutive
+        # positions for each node, starting from its row pointer
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return self.indices[offsets + np.arange(total, dtype=np.int32)]
+
+
+def load_graph(path: str, edges: bool = False, cache_dir: str = None):
+    """
+    Load and compile a graph file; the compiled graph is cached in a binary
+    sidecar file, memory-mapped on later loads. A cached graph is rebuilt
+    whenever the graph file changes.
+
+    Parameters:
+        * path (str): graph adjacency list or edge list file
+        * edges (bool): whether the graph file is an edge list
+        * cache_dir (str|None): directory of compiled graphs; if None, use
+          '.cache' in the directory of the graph file
+
+    Returns:
+        * CSRGraph: compiled graph, named after the graph file (without
+          extension)
+
+    Raises:
+        * OSError: if the graph file can't be read
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(path), '.cache')
+    name = os.path.basename(path)
+    graph_uid = os.path.splitext(name)[0]
+    cache_path = os.path.join(cache_dir,
+            name + ('.edges' if edges else '') + '.csr')
+
+    stat = os.stat(path)
+    source = {
+        'version': _CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'edges': edges
+    }
+
+    try:
+        meta, arrays = storage.map_arrays(cache_path)
+        if meta['source'] == source:
+            return CSRGraph(meta['labels'], arrays['indptr'],
+                    arrays['indices'], graph_uid)
+    except (OSError, ValueError, KeyError):
+        # missing or corrupted cache
+        pass
+
+    with open(path) as f:
+        lines = f.readlines()
+    graph = nx.parse_edgelist(lines) if edges else nx.parse_adjlist(lines)
+    graph.name = graph_uid
+    compiled = CSRGraph.from_networkx(graph)
+
+    # caching is best effort: graph directory may be read-only
+    try:
+        util.make_dir_check_writable(cache_dir)
+        tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        storage.write_arrays(tmp_path, {
+            'source': source,
+            'labels': compiled.labels
+        }, {
+            'indptr': compiled.indptr,
+            'indices': compiled.indices
+        })
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+    return compiled
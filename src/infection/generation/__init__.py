@@ -1 +1,7 @@
-from .factory import Factory
+from .._lazy import attach
+
+
+# public names, by module; modules are imported on first use
+__getattr__, __dir__, __all__ = attach(__name__, {
+    'Factory': 'factory',
+})
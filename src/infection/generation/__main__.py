@@ -5,12 +5,12 @@ Generate graphs.
 """
 
 import argparse
-import hashlib
-import os.path
+import sys
 
 import networkx as nx
 
 from . import *
+from .. import storage
 from .. import util
 
 
@@ -24,6 +24,17 @@ def main():
     parser.add_argument('--save', help="""Save graph adjacency list in graph
             directory and return graph UID (file hash). See also '--graph-dir'
             for more info.""", action='store_true')
+    # build edge arrays instead of networkx graphs
+    parser.add_argument('-f', '--fast', help="""Generate graph edges
+            directly, in time and memory linear in the graph size; this is
+            much faster for large graphs. The generated graph follows the
+            same template, but its adjacency list (hence its UID) may differ
+            even for non-random templates.""", action='store_true')
+    # random seed for --fast
+    parser.add_argument('--seed', metavar='SEED', help="""With '--fast',
+            seed the random generator with SEED (non-negative integer), so
+            that the graph is reproducible. By default, use fresh
+            entropy.""", type=int, default=None)
     # human-friendly output for --save
     parser.add_argument('-v', '--verbose', help="""With '--save', print graph
             directory and UID in a fancy way.""", action='store_true')
@@ -54,20 +65,23 @@ def main():
     templ_kwargs = {v: vars(args)[v] for v in templ.value['vars']}
 
     # create graph
-    g = Factory().build(templ, **templ_kwargs)
-    txt = '\n'.join(nx.generate_adjlist(g)) + '\n'
+    try:
+        if args.fast:
+            g = Factory().build_csr(templ, args.seed, **templ_kwargs)
+        else:
+            g = Factory().build(templ, **templ_kwargs)
+    except ValueError as e:
+        util.die(__package__, e)
+    lines = g.generate_adjlist() if args.fast else nx.generate_adjlist(g)
 
     if args.save:
         # we don't use nx.write_adjlist() because it adds a commment and this
         # behaviour can't be avoided; instead we create a file whose content
-        # is the same text that would be printed on stdout
-        file_hash = hashlib.sha1(txt.encode()).hexdigest()
-        file_path = os.path.join(args.graph_dir, file_hash + '.adjlist')
-
+        # is the same text that would be printed on stdout, streamed while
+        # its hash is computed
         try:
             graph_dir = util.make_dir_check_writable(args.graph_dir)
-            with open(file_path, 'w') as f:
-                f.write(txt)
+            file_hash = storage.save_graph(lines, graph_dir)
         except OSError as e:
             util.die(__package__, e)
 
@@ -77,7 +91,10 @@ def main():
         else:
             print(file_hash)
     else:
-        print(txt, end='')
+        try:
+            storage.write_graph(sys.stdout, lines)
+        except OSError as e:
+            util.die(__package__, e)
 
 if __name__ == "__main__":
     main()
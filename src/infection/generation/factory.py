@@ -2,6 +2,9 @@ import enum
 import random
 
 import networkx as nx
+import numpy as np
+
+from ..csr import CSRGraph
 
 
 def _build_cycle(nodes: int):
@@ -51,6 +54,88 @@ def _build_torus_matching(columns: int, rows: int):
             _build_matching(columns*rows))
 
 
+# fast builders: each one returns an int64 array of node pairs, with shape
+# (edges, 2), instead of a networkx graph; edges may be repeated
+
+def _edges_cycle(rng, nodes: int):
+    heads = np.arange(nodes, dtype=np.int64)
+    return np.stack((heads, (heads + 1) % max(nodes, 1)), axis=1)
+
+
+def _edges_erdos_renyi(rng, nodes: int, probability: float):
+    # pairs (u, v), with u < v, are numbered v*(v-1)/2 + u; the gaps between
+    # chosen pair numbers are geometric, so only chosen pairs are visited
+    pairs = nodes * (nodes - 1) // 2
+    if probability <= 0 or pairs == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    chunks, last = [], -1
+    while last < pairs:
+        # enough gaps to reach the last pair, most of the times
+        size = int(1.1 * (pairs - last) * probability) + 64
+        chosen = last + np.cumsum(rng.geometric(probability, size))
+        chunks.append(chosen)
+        last = int(chosen[-1])
+    chosen = np.concatenate(chunks)
+    chosen = chosen[chosen < pairs]
+    tails = ((1 + np.sqrt(1 + 8 * chosen.astype(np.float64))) // 2) \
+            .astype(np.int64)
+    # fix floating point rounding
+    tails -= tails * (tails - 1) // 2 > chosen
+    tails += (tails + 1) * tails // 2 <= chosen
+    heads = chosen - tails * (tails - 1) // 2
+    return np.stack((heads, tails), axis=1)
+
+
+def _edges_matching(rng, nodes: int):
+    node_ls = rng.permutation(nodes)
+    return np.stack((node_ls[:nodes//2], node_ls[nodes//2:]), axis=1)
+
+
+def _edges_torus(rng, columns: int, rows: int):
+    # same node numbering as _build_torus(): column after column; as in
+    # nx.grid_2d_graph(), an axis wraps only if longer than two nodes
+    index = np.arange(columns * rows, dtype=np.int64).reshape(columns, rows)
+    edges = []
+    for axis, size in enumerate((columns, rows)):
+        shifted = np.roll(index, -1, axis=axis)
+        if size <= 2:
+            # drop wrapping edges
+            keep = [slice(None), slice(None)]
+            keep[axis] = slice(0, size - 1)
+            edges.append((index[tuple(keep)], shifted[tuple(keep)]))
+        else:
+            edges.append((index, shifted))
+    return np.concatenate([np.stack((h.ravel(), t.ravel()), axis=1)
+                           for h, t in edges])
+
+
+def _edges_cycle_erdos_renyi(rng, nodes: int, probability: float):
+    return np.concatenate((
+            _edges_cycle(rng, nodes),
+            _edges_erdos_renyi(rng, nodes, probability)))
+
+
+def _edges_cycle_matching(rng, nodes: int):
+    return np.concatenate((
+            _edges_cycle(rng, nodes),
+            _edges_matching(rng, nodes)))
+
+
+def _edges_torus_erdos_renyi(rng, columns: int, rows: int,
+        probability: float):
+    return np.concatenate((
+            _edges_torus(rng, columns, rows),
+            _edges_erdos_renyi(rng, columns*rows, probability)))
+
+
+def _edges_torus_matching(rng, columns: int, rows: int):
+    if (columns*rows) % 2 == 1:
+        raise ValueError('odd number of nodes')
+    return np.concatenate((
+            _edges_torus(rng, columns, rows),
+            _edges_matching(rng, columns*rows)))
+
+
 class Factory:
 
     class Template(enum.Enum):
@@ -65,7 +150,8 @@ class Factory:
                     'test': lambda n: n >= 0
                 }
             },
-            'builder': _build_cycle
+            'builder': _build_cycle,
+            'edges': _edges_cycle
         }
 
         ERDOS_RENYI = {
@@ -83,7 +169,8 @@ class Factory:
                     'test': lambda p: 0 <= p <= 1
                 }
             },
-            'builder': _build_erdos_renyi
+            'builder': _build_erdos_renyi,
+            'edges': _edges_erdos_renyi
         }
 
         MATCHING = {
@@ -95,7 +182,8 @@ class Factory:
                     'test': lambda n: n >= 0 and n % 2 == 0
                 }
             },
-            'builder': _build_matching
+            'builder': _build_matching,
+            'edges': _edges_matching
         }
 
         CYCLE_U_ERDOS_RENYI = {
@@ -112,7 +200,8 @@ class Factory:
                     'test': lambda p: 0 <= p <= 1
                 }
             },
-            'builder': _build_cycle_erdos_renyi
+            'builder': _build_cycle_erdos_renyi,
+            'edges': _edges_cycle_erdos_renyi
         }
 
         CYCLE_U_MATCHING = {
@@ -124,7 +213,8 @@ class Factory:
                     'test': lambda n: n >= 0 and n % 2 == 0
                 }
             },
-            'builder': _build_cycle_matching
+            'builder': _build_cycle_matching,
+            'edges': _edges_cycle_matching
         }
 
         TORUS = {
@@ -142,7 +232,8 @@ class Factory:
                     'test': lambda n: n >= 0
                 }
             },
-            'builder': _build_torus
+            'builder': _build_torus,
+            'edges': _edges_torus
         }
 
         TORUS_U_ERDOS_RENYI = {
@@ -164,7 +255,8 @@ class Factory:
                     'test': lambda p: 0 <= p <= 1
                 }
             },
-            'builder': _build_torus_erdos_renyi
+            'builder': _build_torus_erdos_renyi,
+            'edges': _edges_torus_erdos_renyi
         }
 
         TORUS_U_MATCHING = {
@@ -181,12 +273,55 @@ class Factory:
                     'test': lambda n: n >= 0
                 }
             },
-            'builder': _build_torus_matching
+            'builder': _build_torus_matching,
+            'edges': _edges_torus_matching
         }
 
 
     def build(self, template: Template, **kwargs) -> nx.Graph:
         """Build graph from template."""
+        self.__check(template, kwargs)
+        return template.value['builder'](**kwargs)
+
+    def build_edges(self, template: Template, seed=None, **kwargs):
+        """
+        Build graph from template, as an edge array; this takes linear time
+        and memory in the number of nodes and edges, and no networkx graph
+        is built. Nodes are numbered as in `build()`.
+
+        Parameters:
+            * template (Template): graph template
+            * seed (int|None): random generator seed; if None, use fresh
+              entropy
+            * kwargs (dict): template variables
+
+        Returns:
+            * tuple: number of nodes (int) and edges (numpy.ndarray), as
+              node pairs with shape (edges, 2); each edge appears once,
+              with its smaller node first, and edges are sorted
+        """
+        self.__check(template, kwargs)
+        nodes = kwargs['nodes'] if 'nodes' in kwargs \
+                else kwargs['columns'] * kwargs['rows']
+        edges = template.value['edges'](np.random.default_rng(seed),
+                **kwargs)
+        # union of templates: drop repeated edges
+        edges = np.sort(edges, axis=1)
+        keys = np.sort(edges[:, 0] * max(nodes, 1) + edges[:, 1])
+        unique = np.ones(keys.size, dtype=bool)
+        unique[1:] = keys[1:] != keys[:-1]
+        keys = keys[unique]
+        return nodes, np.stack(np.divmod(keys, max(nodes, 1)), axis=1)
+
+    def build_csr(self, template: Template, seed=None, **kwargs) -> CSRGraph:
+        """
+        Build graph from template, compiled to CSR arrays; see
+        `build_edges()`.
+        """
+        return CSRGraph.from_edges(*self.build_edges(template, seed,
+                **kwargs))
+
+    def __check(self, template: Template, kwargs: dict):
         templ_vars = template.value['vars']
 
         for tv in templ_vars:
@@ -200,5 +335,3 @@ class Factory:
 
             if not templ_vars[tv]['test'](kwargs[tv]):
                 raise ValueError(f"{tv} invalid value - {info}")
-
-        return template.value['builder'](**kwargs)
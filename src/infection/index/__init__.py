@@ -0,0 +1,3 @@
+from .uid_index import CONTAINER_EXT, INDEX_NAME
+from .uid_index import UIDIndex, index_file, indexed_path, scan_records
+from .uid_index import walk_files
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# vim: ts=8 et sw=4 sts=4
+"""
+Index graph and evolution directories, so that UIDs are resolved without
+listing them.
+"""
+
+import argparse
+import sqlite3
+
+from . import *
+from .. import util
+
+
+def main():
+    parser = argparse.ArgumentParser(prog=__package__, description=__doc__)
+    # indexed directories
+    parser.add_argument('directory', metavar='DIR', nargs='+',
+            help="""Graph or evolution directory to index. The index is
+            rebuilt from the directory contents.""", type=str)
+    # move files to sharded subdirectories
+    shard_g = parser.add_mutually_exclusive_group()
+    shard_g.add_argument('--shard', help="""Move files to subdirectories
+            named after their hash (e.g. 'ab/cd/FILE'); files saved later
+            follow suit.""", action='store_true')
+    shard_g.add_argument('--unshard', help="""Move files from subdirectories
+            back to the directory; files saved later follow suit.""",
+            action='store_true')
+    # parse sys.argv
+    args = parser.parse_args()
+
+    for directory in args.directory:
+        try:
+            with UIDIndex(directory) as index:
+                if args.shard or args.unshard:
+                    index.shard(args.shard)
+                else:
+                    index.rebuild()
+        except (OSError, sqlite3.Error) as e:
+            util.die(__package__, e)
+
+
+if __name__ == "__main__":
+    main()
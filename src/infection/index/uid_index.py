@@ -0,0 +1,339 @@
+import errno
+import hashlib
+import os
+import sqlite3
+
+
+# index file name, in the indexed directory
+INDEX_NAME = '.index.sqlite'
+
+# extension of files containing many records, each one with its own UID
+CONTAINER_EXT = '.evos'
+
+
+class UIDIndex:
+
+    def __init__(self, directory: str, create: bool = True):
+        """
+        Index of the files in a graph or evolution directory, by file name,
+        so that the file matching a UID prefix is found in logarithmic time
+        instead of listing the whole directory.
+
+        The index is a SQLite database in the directory itself; it is
+        created, and filled from the directory contents, when files are
+        first saved, not when they are only looked up (see `create`). Files
+        may be kept in sharded subdirectories ('ab/cd/NAME', where 'abcd'
+        comes from the hash of NAME), so that no directory grows too large;
+        see `shard()`.
+
+        Container files (with extension '.evos') hold many records, one per
+        line, each one starting with '{"uid": "UID"'; records are indexed by
+        UID, with their offset and length in the container, and the
+        containers themselves are not.
+
+        Parameters:
+            * directory (str): indexed directory
+            * create (bool): whether to create the index if missing; lookups
+              don't, so that reading a directory doesn't write to it
+
+        Attributes:
+            * directory (str): indexed directory
+            * sharded (bool): whether new files go to sharded subdirectories
+
+        Raises:
+            * sqlite3.Error: if the index can't be opened or created (e.g.
+              missing or read-only directory), or if it is missing and
+              `create` is False
+        """
+        self.directory = directory
+        index_path = os.path.join(directory, INDEX_NAME)
+        created = not os.path.exists(index_path)
+        if created and not create:
+            raise sqlite3.OperationalError("no index in '%s'" % directory)
+        # many processes may save files at the same time
+        self.__db = sqlite3.connect(index_path, timeout=60)
+        # the journal file is kept, so that writing the index doesn't change
+        # the directory modification time, see `locate()`
+        self.__db.execute("PRAGMA journal_mode=TRUNCATE")
+        with self.__db:
+            self.__db.execute("""CREATE TABLE IF NOT EXISTS files (
+                    name TEXT PRIMARY KEY, path TEXT NOT NULL)""")
+            self.__db.execute("""CREATE TABLE IF NOT EXISTS records (
+                    name TEXT PRIMARY KEY, path TEXT NOT NULL,
+                    offset INTEGER NOT NULL, length INTEGER NOT NULL)""")
+            self.__db.execute("""CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY, value TEXT NOT NULL)""")
+        row = self.__db.execute(
+                "SELECT value FROM meta WHERE key = 'sharded'").fetchone()
+        self.sharded = row is not None and row[0] == '1'
+        if created:
+            self.rebuild()
+
+    def close(self):
+        """Close the index database."""
+        self.__db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def new_path(self, name: str) -> str:
+        """
+        Return the path a new file should be saved to, creating its
+        sharded subdirectories if needed; see `add()`.
+
+        Parameters:
+            * name (str): file name
+        """
+        if not self.sharded:
+            return os.path.join(self.directory, name)
+        shard = os.path.join(self.directory, *_shard(name))
+        os.makedirs(shard, exist_ok=True)
+        return os.path.join(shard, name)
+
+    def add(self, name: str):
+        """
+        Add a file, once saved to `new_path(name)`, to the index.
+
+        Parameters:
+            * name (str): file name
+        """
+        path = os.path.relpath(self.new_path(name), self.directory)
+        with self.__db:
+            self.__db.execute("INSERT OR REPLACE INTO files VALUES (?, ?)",
+                    (name, path))
+
+    def add_records(self, container: str, records: list):
+        """
+        Add records, appended to a container file, to the index.
+
+        Parameters:
+            * container (str): container file path
+            * records (list): records, as tuples (UID, offset, length)
+        """
+        path = os.path.relpath(container, self.directory)
+        with self.__db:
+            self.__db.executemany(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                    ((uid, path, offset, length)
+                     for uid, offset, length in records))
+
+    def lookup(self, prefix: str) -> str:
+        """
+        Return path of the file whose name starts with prefix. If the index
+        is stale, it is rebuilt once before giving up.
+
+        Parameters:
+            * prefix (str): UID prefix to search for a matching file
+
+        Returns:
+            * str: matching file path
+
+        Raises:
+            * FileNotFoundError: if no file or too many files in directory are
+            matching prefix, or if prefix matches a record in a container
+        """
+        path, offset, _ = self.locate(prefix)
+        if offset is not None:
+            raise FileNotFoundError(errno.ENOENT,
+                    "UID '%s' is a record in '%s', not a file." %
+                    (prefix, path))
+        return path
+
+    def locate(self, prefix: str) -> tuple:
+        """
+        Return location of the file or record whose UID starts with prefix.
+        Rows of files no longer existing are ignored. If nothing matches and
+        the directory changed since the index was last rebuilt (e.g. files
+        were added by hand), the index is rebuilt once before giving up; so
+        a mistyped UID doesn't read the whole directory every time.
+
+        Parameters:
+            * prefix (str): UID prefix to search for
+
+        Returns:
+            * tuple: file path (str), and record offset and length (int) in
+              that file; offset and length are None for a whole file
+
+        Raises:
+            * FileNotFoundError: if no file or record, or more than one, is
+            matching prefix
+        """
+        try:
+            return self.__locate(prefix)
+        except FileNotFoundError as e:
+            if e.errno != errno.ENOENT or not self.__changed():
+                raise
+        # matching file may have been added or moved by hand
+        self.rebuild()
+        return self.__locate(prefix)
+
+    def __locate(self, prefix: str) -> tuple:
+        # names starting with prefix come first among names not lower than
+        # prefix; rows are read until two existing files are found
+        candidates = []
+        for query in ("""SELECT name, path, NULL, NULL FROM files
+                        WHERE name >= ? ORDER BY name""",
+                      """SELECT name, path, offset, length FROM records
+                        WHERE name >= ? ORDER BY name"""):
+            for name, path, offset, length in self.__db.execute(query,
+                    (prefix,)):
+                if not name.startswith(prefix) or len(candidates) > 1:
+                    break
+                path = os.path.join(self.directory, path)
+                if os.path.isfile(path):
+                    candidates.append((path, offset, length))
+        if len(candidates) > 1:
+            raise FileNotFoundError(errno.ENOKEY,
+                    "Too many matching files in '%s' for UID '%s'." %
+                    (self.directory, prefix))
+        if candidates:
+            return candidates[0]
+        raise FileNotFoundError(errno.ENOENT,
+                "No matching file in '%s' for UID '%s'." %
+                (self.directory, prefix))
+
+    def __changed(self) -> bool:
+        # whether the directory changed since the last rebuild
+        row = self.__db.execute(
+                "SELECT value FROM meta WHERE key = 'mtime'").fetchone()
+        return row is None or \
+            row[0] != str(os.stat(self.directory).st_mtime_ns)
+
+    def rebuild(self):
+        """Rebuild the index from the directory contents."""
+        paths = list(walk_files(self.directory))
+        with self.__db:
+            self.__db.execute("DELETE FROM files")
+            self.__db.execute("DELETE FROM records")
+            self.__db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?)",
+                    ((os.path.basename(path), path) for path in paths
+                     if not path.endswith(CONTAINER_EXT)))
+            for path in paths:
+                if path.endswith(CONTAINER_EXT):
+                    self.add_records(os.path.join(self.directory, path),
+                            scan_records(os.path.join(self.directory, path)))
+        # stat after writing, as a new journal file changes the directory
+        with self.__db:
+            self.__db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    ('mtime', str(os.stat(self.directory).st_mtime_ns)))
+
+    def shard(self, sharded: bool = True):
+        """
+        Move all the files to sharded subdirectories, or back to the
+        directory itself; files saved later follow suit.
+
+        Parameters:
+            * sharded (bool): whether files are sharded
+        """
+        with self.__db:
+            self.__db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    ('sharded', '1' if sharded else '0'))
+        self.sharded = sharded
+        for path in list(walk_files(self.directory)):
+            name = os.path.basename(path)
+            new_path = self.new_path(name)
+            os.replace(os.path.join(self.directory, path), new_path)
+            if os.path.dirname(path):
+                # drop emptied shards
+                try:
+                    os.removedirs(os.path.join(self.directory,
+                            os.path.dirname(path)))
+                except OSError:
+                    pass
+        self.rebuild()
+
+
+def indexed_path(directory: str, name: str) -> str:
+    """
+    Return the path a new file should be saved to; once saved, the file is
+    added to the directory index by `index_file()`. If the index can't be
+    used, the file is saved in the directory itself.
+
+    Parameters:
+        * directory (str): graph or evolution directory
+        * name (str): file name
+    """
+    try:
+        with UIDIndex(directory) as index:
+            return index.new_path(name)
+    except (OSError, sqlite3.Error):
+        return os.path.join(directory, name)
+
+
+def index_file(directory: str, name: str):
+    """
+    Add a file, saved to `indexed_path()`, to the directory index. Indexing
+    is best effort: if the index can't be written, the file will be
+    indexed when the index is rebuilt.
+
+    Parameters:
+        * directory (str): graph or evolution directory
+        * name (str): file name
+    """
+    try:
+        with UIDIndex(directory) as index:
+            index.add(name)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def scan_records(container: str):
+    """
+    Return the records of a container file, reading it all.
+
+    Parameters:
+        * container (str): container file path
+
+    Returns:
+        * list: records, as tuples (UID, offset, length); a truncated last
+          record (e.g. from an interrupted write) is left out
+    """
+    records, offset = [], 0
+    head = len(b'{"uid": "')
+    with open(container, 'rb') as f:
+        for line in f:
+            if line.endswith(b'\n') and line.startswith(b'{"uid": "'):
+                uid = line[head:line.index(b'"', head)].decode()
+                records.append((uid, offset, len(line)))
+            offset += len(line)
+    return records
+
+
+def _shard(name: str) -> tuple:
+    # UIDs may share long prefixes (e.g. evolutions of the same graph), so
+    # shards come from the hash of the whole name
+    digest = hashlib.sha1(name.encode()).hexdigest()
+    return digest[:2], digest[2:4]
+
+
+def _is_shard(name: str) -> bool:
+    return len(name) == 2 and not name.startswith('.')
+
+
+def walk_files(directory: str):
+    """
+    Generate the paths of the visible files in a directory and in its
+    shards, relative to the directory, in no particular order; see
+    `UIDIndex.shard()`.
+
+    Parameters:
+        * directory (str): graph or evolution directory
+
+    Raises:
+        * OSError: if the directory can't be listed
+    """
+    for entry in os.scandir(directory):
+        if entry.name.startswith('.'):
+            continue
+        if entry.is_file():
+            yield entry.name
+        elif entry.is_dir() and _is_shard(entry.name):
+            for sub in os.scandir(entry.path):
+                if not (sub.is_dir() and _is_shard(sub.name)):
+                    continue
+                for leaf in os.scandir(sub.path):
+                    if leaf.is_file() and not leaf.name.startswith('.'):
+                        yield os.path.join(entry.name, sub.name, leaf.name)
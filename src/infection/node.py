@@ -3,14 +3,17 @@ import enum
 
 class State(enum.Enum):
     SUSCEPTIBLE = {
+            'code': 0,
             'cli_str': '\033[1;34m*\033[0m',
             'plt_col': 'lightblue'
     }
     INFECTIOUS  = {
+            'code': 1,
             'cli_str': '\033[1;31m*\033[0m',
             'plt_col': 'red'
     }
     RECOVERED   = {
+            'code': 2,
             'cli_str': '\033[1;32m*\033[0m',
             'plt_col': 'green'
     }
@@ -0,0 +1,214 @@
+import collections.abc
+
+import numpy as np
+
+from .node import State
+
+
+# rounds between two consecutive keyframes
+KEYFRAME_INTERVAL = 64
+
+
+class Rounds(collections.abc.Sequence):
+
+    def __init__(self, zeroes=(), keyframe_interval: int = KEYFRAME_INTERVAL):
+        """
+        Infection rounds, stored as per-round transitions plus periodic
+        keyframes; any round is rebuilt from the closest keyframe before it.
+
+        Parameters:
+            * zeroes (iterable): initially infectious nodes
+            * keyframe_interval (int): rounds between two keyframes
+
+        Attributes:
+            * keyframe_interval (int): rounds between two keyframes
+            * keyframes (list): states of rounds 0, K, 2K, ...; each keyframe
+              is a dictionary with two keys:
+                - 'i': list of infectious nodes
+                - 'r': list of recovered nodes
+            * deltas (list): transitions leading to rounds 1, 2, ...; each
+              delta is a dictionary with three keys:
+                - 'i': list of newly infectious nodes
+                - 'r': list of newly recovered nodes
+                - 's': list of newly susceptible nodes
+        """
+        if keyframe_interval < 1:
+            raise ValueError('keyframe interval must be a positive integer')
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = []
+        self.deltas = []
+
+        # node states of the last round
+        self.__infectious = set(zeroes)
+        self.__recovered = set()
+        self._save_keyframe()
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Load rounds from their dictionary representation.
+
+        Parameters:
+            * data (dict): dictionary as returned by `to_dict()`
+
+        Raises:
+            * KeyError: if any field is missing
+        """
+        rounds = cls((), data['keyframe-interval'])
+        rounds.keyframes = data['keyframes']
+        rounds.deltas = data['deltas']
+        # restore node states of the last round
+        last = rounds[-1]
+        rounds.__infectious = set(last['i'])
+        rounds.__recovered = set(last['r'])
+        return rounds
+
+    @classmethod
+    def from_list(cls, round_list: list,
+            keyframe_interval: int = KEYFRAME_INTERVAL):
+        """
+        Load rounds from a list of full round states, as stored by
+        evolution files without keyframes.
+        """
+        rounds = cls(round_list[0]['i'] if round_list else (),
+                keyframe_interval)
+        for prev, curr in zip(round_list, round_list[1:]):
+            prev_i, prev_r = set(prev['i']), set(prev['r'])
+            curr_i, curr_r = set(curr['i']), set(curr['r'])
+            rounds.append(curr_i - prev_i, curr_r - prev_r, prev_r - curr_r)
+        return rounds
+
+    def to_dict(self) -> dict:
+        """Return a JSON-serializable dictionary representation."""
+        return {
+            'keyframe-interval': self.keyframe_interval,
+            'keyframes': self.keyframes,
+            'deltas': self.deltas
+        }
+
+    def append(self, infected=(), recovered=(), susceptible=()):
+        """
+        Append the next round, given the nodes changing state.
+
+        Parameters:
+            * infected (iterable): susceptible nodes becoming infectious
+            * recovered (iterable): infectious nodes becoming recovered
+            * susceptible (iterable): recovered nodes becoming susceptible
+        """
+        delta = {'i': [*infected], 'r': [*recovered], 's': [*susceptible]}
+        self.deltas.append(delta)
+        _apply(self.__infectious, self.__recovered, delta)
+        if len(self.deltas) % self.keyframe_interval == 0:
+            self._save_keyframe()
+
+    def _save_keyframe(self):
+        self.keyframes.append({
+            'i': [*self.__infectious],
+            'r': [*self.__recovered]
+        })
+
+    def __len__(self):
+        return len(self.deltas) + 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[k] for k in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('round index out of range')
+
+        # start from the closest keyframe, then replay transitions
+        base = index // self.keyframe_interval
+        infectious = set(self.keyframes[base]['i'])
+        recovered = set(self.keyframes[base]['r'])
+        for delta in self.deltas[base * self.keyframe_interval:index]:
+            _apply(infectious, recovered, delta)
+        return {'i': [*infectious], 'r': [*recovered]}
+
+    def __iter__(self):
+        return self.iterate()
+
+    def iterate(self, first: int = 0, last: int = None):
+        """
+        Iterate over rounds from `first` (included) to `last` (excluded),
+        seeking to the first round and then replaying each transition once.
+        """
+        first, last, _ = slice(first, last).indices(len(self))
+        if first >= last:
+            return
+        state = self[first]
+        infectious, recovered = set(state['i']), set(state['r'])
+        yield state
+        for delta in self.deltas[first:last - 1]:
+            _apply(infectious, recovered, delta)
+            yield {'i': [*infectious], 'r': [*recovered]}
+
+
+def _apply(infectious: set, recovered: set, delta: dict):
+    """Apply round transitions to node states, in place."""
+    infectious.difference_update(delta['r'])
+    infectious.update(delta['i'])
+    recovered.difference_update(delta['s'])
+    recovered.update(delta['r'])
+
+
+def iterate(rounds, first: int = 0, last: int = None):
+    """
+    Iterate over rounds from `first` (included) to `last` (excluded).
+
+    Parameters:
+        * rounds (Sequence): list of rounds, or any sequence of rounds
+          providing an `iterate()` method, like `Rounds`
+        * first (int): first round index
+        * last (int|None): round index to stop at; if None, stop after the
+          last round
+    """
+    # seekable sequences replay transitions from the first round only
+    if hasattr(rounds, 'iterate'):
+        return rounds.iterate(first, last)
+    return iter(rounds[first:last])
+
+
+def state_array(round_dict: dict, index: dict,
+        out: np.ndarray = None) -> np.ndarray:
+    """
+    Return the state code of each node at a round, by node index.
+
+    Parameters:
+        * round_dict (dict): round, with infectious ('i') and recovered ('r')
+          nodes
+        * index (dict): node indices, by node label; nodes not in index are
+          ignored
+        * out (numpy.ndarray|None): array to fill, instead of a new one
+
+    Returns:
+        * numpy.ndarray: uint8 state codes, see `State`
+    """
+    if out is None:
+        out = np.empty(len(index), dtype=np.uint8)
+    out.fill(State.SUSCEPTIBLE.value['code'])
+    for key, state in (('i', State.INFECTIOUS), ('r', State.RECOVERED)):
+        out[np.fromiter((index[label] for label in round_dict[key]
+                         if label in index), dtype=np.int64)] = \
+                state.value['code']
+    return out
+
+
+def from_evolution(data: dict):
+    """
+    Return the rounds of an evolution, in any of the supported formats.
+
+    Parameters:
+        * data (dict): evolution, as read from an evolution file
+
+    Returns:
+        * Sequence: list of rounds for evolutions storing full round states,
+          `Rounds` for evolutions storing transitions and keyframes
+
+    Raises:
+        * KeyError: if no rounds are found
+    """
+    if 'rounds' in data:
+        return data['rounds']
+    return Rounds.from_dict(data)
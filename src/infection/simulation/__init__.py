@@ -1 +1,20 @@
-from .evolution import Evolution
+from .._lazy import attach
+
+
+# public names, by module; modules are imported on first use, e.g. scipy
+# only with `BatchEvolution`
+__getattr__, __dir__, __all__ = attach(__name__, {
+    'AdaptiveSweep': 'adaptive',
+    'ArrayEvolution': 'array_evolution',
+    'BatchEvolution': 'batch',
+    'Engine': 'engine',
+    'Manifest': 'manifest',
+    'Evolution': 'evolution',
+    'Metrics': 'observer',
+    'Observer': 'observer',
+    'RoundStats': 'observer',
+    'Percolation': 'percolation',
+    'GraphCache': 'server',
+    'Server': 'server',
+    'Summary': 'summary',
+})
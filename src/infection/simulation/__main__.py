@@ -6,15 +6,22 @@ Simulate epidemic spreading in a SI[R][S]-model based network.
 
 import argparse
 import hashlib
-import json
 import os
-import random
-import uuid
+import sys
 
 import networkx as nx
+import numpy as np
 
-from . import *
+from . import adaptive
+from . import client
+from . import sweep
+from .adaptive import AdaptiveSweep
+from .engine import Engine
+from .manifest import Manifest
+from .percolation import Percolation
+from .. import storage
 from .. import util
+from ..csr import CSRGraph, load_graph
 
 
 def main():
@@ -24,6 +31,43 @@ def main():
             help="""Graph directory path; this is created when needed. By
             default, use 'graphs' in the working directory).""",
             type=str, default='graphs')
+    # adaptive number of evolutions
+    parser.add_argument('-a', '--adaptive', metavar='WIDTH',
+            help="""Instead of NUM evolutions for each probability, keep
+            adding evolutions to each probability until the confidence
+            interval of the mean attack rate (i.e. final size over number of
+            nodes) is at most WIDTH wide, or MAX evolutions are reached; NUM
+            is then the minimum, and must be at least 10. If evolutions of a
+            probability don't vary, its interval follows the rule of three,
+            so that it doesn't stop early by chance. Evolutions are added in
+            waves, more of them where the attack rate varies most (e.g. near
+            the epidemic threshold); results do not depend on '--jobs'. See
+            also '--count', '--max-count', '--confidence' and '--quantile'.
+            Not compatible with '--percolation', '--resume' and
+            '--connect'.""",
+            type=float, default=None)
+    # confidence level of adaptive sweeps
+    parser.add_argument('--confidence', metavar='LEVEL',
+            help="""With '--adaptive', use confidence intervals with LEVEL
+            confidence, in range (0, 1). By default, LEVEL is 0.95.""",
+            type=float, default=.95)
+    # most evolutions of adaptive sweeps
+    parser.add_argument('--max-count', metavar='MAX',
+            help="""With '--adaptive', generate MAX evolutions at most for
+            each probability. By default, MAX is 1000.""", type=int,
+            default=1000)
+    # quantile targeted by adaptive sweeps
+    parser.add_argument('--quantile', metavar='Q',
+            help="""With '--adaptive', target the confidence interval of the
+            Q quantile of the attack rate (e.g. 0.5 for the median), in range
+            [0, 1], instead of the mean.""", type=float, default=None)
+    # simulation server
+    parser.add_argument('--connect', metavar='SOCKET',
+            help="""Submit the evolutions to the simulation server listening
+            on SOCKET (see infection.simulation.server), which keeps graphs
+            in memory between invocations; '--jobs' is then up to the server.
+            Requires '--graph-uid'. Not compatible with '--percolation'.""",
+            type=str, default=None)
     # directory evolutions are saved in
     parser.add_argument('--evolution-dir', metavar='PATH',
             help="""Evolution directory path; this is created when needed. By
@@ -32,7 +76,18 @@ def main():
     # how many evolutions to generate
     parser.add_argument('-c', '--count', metavar='NUM',
             help="""Generate NUM infection evolutions for each probability.
+            With '--adaptive', NUM is the minimum, and must be at least 10.
             By default, NUM is 1.""", type=int, default=1)
+    # evolution file format
+    parser.add_argument('-f', '--format', metavar='FORMAT',
+            help="""Write evolutions in FORMAT format. Available formats are:
+            """ + str([*storage.Format.__members__])[1:-1] + """. If FORMAT is
+            missing, default is 'JSON'. 'NDJSON' evolutions are written while
+            rounds are computed, keeping memory usage low; 'BINARY' files are
+            smaller and faster to read for large graphs, and require
+            '--save'; 'ROUNDS' writes the full state of every round, like
+            earlier versions.""", type=str, choices=storage.Format.__members__,
+            default='JSON')
     # input graph:
     graph_g = parser.add_mutually_exclusive_group(required=True)
     # - by UID
@@ -45,6 +100,19 @@ def main():
             help="""File containing the graph adjacency list or the graph edge
             list without data. If FILE is -, read standard input.""",
             type=argparse.FileType(), default=None)
+    # simulation engine
+    parser.add_argument('--engine', metavar='ENGINE',
+            help="""Simulate using ENGINE engine. Available engines are: """ +
+            str([*Engine.__members__])[1:-1] + """. If ENGINE is missing,
+            default is 'SET'; 'ARRAY' is much faster on large graphs.""",
+            type=str, choices=Engine.__members__, default='SET')
+    # advance all the evolutions of a probability together
+    parser.add_argument('-b', '--batch',
+            help="""Generate the NUM evolutions of each probability together,
+            in lockstep, using vectorized operations over all of them; this is
+            much faster for large NUM. With this option, '--engine' is
+            ignored. See also '--count' for more info.""",
+            action='store_true')
     # flag to read graph file as edge list (default: false)
     parser.add_argument('-e', '--edges',
             help="""Treat graph file as edge list. This option allows to ignore
@@ -65,6 +133,11 @@ def main():
             can be treated as numbers, otherwise all labels will be treated as
             strings, in a "all-or-none" policy.""", choices=['always', 'never'],
             default='auto')
+    # number of worker processes
+    parser.add_argument('-j', '--jobs', metavar='NUM',
+            help="""Generate evolutions on NUM worker processes. Results do
+            not depend on NUM; evolution UIDs are printed in the same order
+            whatever NUM is. By default, NUM is 1.""", type=int, default=1)
     # infection probability
     parser.add_argument('-p', '--probability', metavar='FIRST[,LAST[,COUNT]]',
             help="""Probability an infectious node has to infect nearby nodes
@@ -79,6 +152,30 @@ def main():
             help="""How many rounds a recovered node is immune to the infection.
             If missing, the recovered state is final (i.e. the node will not
             become susceptible again).""", type=int, default=None)
+    # random seed
+    parser.add_argument('--seed', metavar='SEED',
+            help="""Seed the random generators with SEED (non-negative
+            integer), so that results are reproducible. By default, use fresh
+            entropy.""", type=int, default=None)
+    # final sizes of all the probabilities at once
+    parser.add_argument('-P', '--percolation',
+            help="""Instead of evolutions, write tab separated final
+            outbreak sizes, one line per evolution. All the probabilities of
+            an evolution are computed in a single pass, by bond percolation,
+            which is much faster for long probability sweeps; evolutions with
+            the same run number share their random draws. Requires the
+            default infection and recovery durations. Not compatible with
+            '--save', '--summary' and '--jobs'.""", action='store_true')
+    # only count nodes in each state
+    parser.add_argument('-S', '--summary', metavar='WHAT',
+            help="""Instead of evolutions, write tab separated node counts.
+            If WHAT is 'final', write one line per evolution, with its
+            duration, number of infections (i.e. final size, without immunity
+            loss) and infectious peak. If WHAT is 'curves', write one line per
+            evolution round, with the number of susceptible, infectious and
+            recovered nodes. Nodes are never recorded individually, which is
+            much faster and lighter on memory. Not compatible with
+            '--save'.""", choices=['final', 'curves'], default=None)
     # initially infectious nodes(s):
     zero_g = parser.add_mutually_exclusive_group(required=True)
     # - from the command line
@@ -99,10 +196,38 @@ def main():
             directory and return evolution UID.
             See also '--evolution-dir' for more info.""",
             action='store_true')
+    # save all the evolutions to a single file
+    parser.add_argument('-C', '--consolidate', help="""With '--save', append
+            all the evolutions to a single container file in evolution
+            directory, instead of one file each; every evolution keeps its own
+            UID. Requires the 'JSON' format.""", action='store_true')
+    # how often evolutions are written to the container
+    parser.add_argument('--flush-every', metavar='NUM', help="""With
+            '--consolidate', write evolutions to the container NUM at a time.
+            By default, NUM is 100.""", type=int, default=100)
+    # per-round metrics files
+    parser.add_argument('-M', '--metrics', metavar='DIR', help="""Write
+            per-round metrics of each evolution to a tab separated file in
+            DIR, created when needed: round number, frontier size (i.e.
+            infectious nodes), edges probed, random draws, nodes changing
+            state, and seconds spent in the infection and in the update
+            phase. Files are named after evolution UIDs with '--save', else
+            'run-N.tsv', with evolutions numbered from zero. Not compatible
+            with '--batch' and '--percolation'.""", type=str, default=None)
+    # resume an interrupted sweep
+    parser.add_argument('-R', '--resume', help="""With '--save', record
+            finished evolutions in a sweep manifest, in the '.sweeps'
+            subdirectory of the evolution directory, and skip the ones
+            already recorded by an interrupted run of the same command.
+            Evolution UIDs are derived from the sweep, so the evolutions
+            saved and printed are the same as with an uninterrupted run. The
+            interrupted run must use this option too. Requires '--seed'. Not
+            compatible with '--consolidate'.""", action='store_true')
     # human-friendly output for --save
     parser.add_argument('-v', '--verbose', help="""With '--save', print
-            evolution directory and UID in a fancy way.""",
-            action='store_true')
+            evolution directory and UID in a fancy way. With '--adaptive',
+            write the evolution count and the confidence interval of each
+            probability to standard error.""", action='store_true')
     # parse sys.argv
     args = parser.parse_args()
 
@@ -110,6 +235,12 @@ def main():
     if args.count < 0:
         util.die(__package__, ValueError(
             "count: NUM must be a non-negative integer"))
+    if args.jobs < 1:
+        util.die(__package__, ValueError(
+            "jobs: NUM must be a positive integer"))
+    if args.seed is not None and args.seed < 0:
+        util.die(__package__, ValueError(
+            "seed: SEED must be a non-negative integer"))
     if args.infection < 1:
         util.die(__package__, ValueError(
             "infection: ROUNDS must be a positive integer"))
@@ -119,14 +250,245 @@ def main():
     if args.recovery is not None and args.recovery < 1:
         util.die(__package__, ValueError(
             "recovery: ROUNDS must be a positive integer"))
+    if args.format == 'BINARY' and not args.save:
+        util.die(__package__, ValueError(
+            "format: BINARY can't be written to standard output"))
+    if args.percolation and (args.infection != 1
+            or args.recovery is not None):
+        util.die(__package__, ValueError(
+            "percolation: infection must last one round, without recovery"))
+    if args.percolation and (args.save or args.summary or args.jobs > 1):
+        util.die(__package__, ValueError(
+            "percolation: not compatible with save, summary and jobs"))
+    if args.consolidate and not (args.save and args.format == 'JSON'):
+        util.die(__package__, ValueError(
+            "consolidate: requires save and JSON format"))
+    if args.flush_every < 1:
+        util.die(__package__, ValueError(
+            "flush every: NUM must be a positive integer"))
+    if args.summary and args.save:
+        util.die(__package__, ValueError(
+            "summary: summaries can't be saved"))
+    if args.metrics is not None and (args.batch or args.percolation):
+        util.die(__package__, ValueError(
+            "metrics: not compatible with batch and percolation"))
+    if args.resume and not (args.save and args.seed is not None):
+        util.die(__package__, ValueError(
+            "resume: requires save and seed"))
+    if args.resume and args.consolidate:
+        util.die(__package__, ValueError(
+            "resume: not compatible with consolidate"))
+    if args.adaptive is not None and args.adaptive <= 0:
+        util.die(__package__, ValueError(
+            "adaptive: WIDTH must be positive"))
+    if args.adaptive is not None and args.count < adaptive.MIN_COUNT:
+        util.die(__package__, ValueError(
+            "adaptive: count must be at least %d" % adaptive.MIN_COUNT))
+    if args.adaptive is not None and args.max_count < args.count:
+        util.die(__package__, ValueError(
+            "max count: MAX must not be less than count"))
+    if args.adaptive is not None and (args.percolation or args.resume
+            or args.connect is not None):
+        util.die(__package__, ValueError(
+            "adaptive: not compatible with percolation, resume and connect"))
+    if not 0 < args.confidence < 1:
+        util.die(__package__, ValueError(
+            "confidence: LEVEL must be in range (0, 1)"))
+    if args.quantile is not None and not 0 <= args.quantile <= 1:
+        util.die(__package__, ValueError(
+            "quantile: Q must be in range [0, 1]"))
+    if args.connect is not None and (args.graph_file or args.percolation):
+        util.die(__package__, ValueError(
+            "connect: not compatible with graph file and percolation"))
+
+    engine = Engine[args.engine]
+    if args.connect is not None:
+        # graph is loaded, and zeroes are checked, by the server
+        g = sim_graph = None
+        if args.zero is not None:
+            zeroes = args.zero.split(',')
+        elif args.zero_file is not None:
+            lines = [l.split('#')[0].strip() for l in args.zero_file]
+            zeroes = [l for l in lines if l]
+        else:
+            zeroes = []
+    else:
+        g, zeroes = load_inputs(args)
+        # graph is compiled, but some engines need a networkx graph
+        if args.batch or engine.value['compiled'] or args.jobs > 1:
+            sim_graph = g
+        else:
+            sim_graph = g.to_networkx()
+
+    if args.percolation:
+        try:
+            print_percolation(g, zeroes, args.probability, args.count,
+                    args.random_zeroes, args.seed)
+        except OSError as e:
+            util.die(__package__, e)
+        return
+
+    if args.save:
+        try:
+            evo_dir = util.make_dir_check_writable(args.evolution_dir)
+        except OSError as e:
+            util.die(__package__, e)
+
+        if args.verbose:
+            print('Evolution dir:', evo_dir)
+
+    if args.metrics is not None:
+        try:
+            util.make_dir_check_writable(args.metrics)
+        except OSError as e:
+            util.die(__package__, e)
+
+    params = dict(zeroes=zeroes, random_zeroes=args.random_zeroes,
+            infection_duration=args.infection,
+            recovery_duration=args.recovery, engine=engine,
+            batch=args.batch, save=args.save and not args.consolidate,
+            evolution_dir=args.evolution_dir,
+            fmt=storage.Format[args.format], summary=bool(args.summary),
+            metrics_dir=args.metrics)
+
+    if args.adaptive is not None:
+        # tasks are scheduled while results come
+        adaptive_sweep = AdaptiveSweep(args.probability, args.adaptive,
+                args.count, args.max_count, args.confidence, args.quantile,
+                args.seed, args.batch)
+        graph_name = g.name
+        results = adaptive.run(sim_graph, adaptive_sweep, args.jobs,
+                **params)
+    else:
+        # every (probability, evolution) task gets its own seed
+        tasks = sweep.make_tasks(args.probability, args.count, args.seed,
+                args.batch)
+
+        # run only the tasks not recorded by an interrupted run
+        pending = tasks
+        if args.resume:
+            try:
+                manifest = Manifest(evo_dir, sweep_manifest(args, g, zeroes))
+                pending = manifest.pending(tasks)
+            except (OSError, ValueError) as e:
+                util.die(__package__, e)
+            params['sweep_id'] = manifest.uid
+            if args.verbose:
+                print('Sweep manifest:', manifest.path)
+
+        if args.connect is not None:
+            try:
+                graph_name, outputs = client.submit(args.connect,
+                        args.graph_uid, pending, args.graph_dir, args.edges,
+                        args.numeric, **params)
+            except (OSError, ValueError) as e:
+                util.die(__package__, e)
+        else:
+            graph_name = g.name
+            outputs = sweep.run(sim_graph, pending, args.jobs, **params)
+
+        if args.resume:
+            outputs = manifest.merge(tasks, outputs)
+        results = zip(tasks, outputs)
 
+    if args.summary:
+        try:
+            print_summaries(results, args.summary == 'curves')
+        except OSError as e:
+            util.die(__package__, e)
+    elif args.consolidate:
+        try:
+            with storage.EvolutionLog(graph_name, evo_dir,
+                    args.flush_every) as log:
+                if args.verbose:
+                    print('Evolution file:', log.uid)
+                evolutions = (output for _, task_outputs in results
+                              for output in task_outputs)
+                for n, output in enumerate(evolutions):
+                    evo_uid = log.append(output)
+                    if args.metrics is not None:
+                        # UIDs are known only once evolutions are appended
+                        os.replace(os.path.join(args.metrics,
+                                'run-%d.tsv' % n), os.path.join(args.metrics,
+                                evo_uid + '.tsv'))
+                    if args.verbose:
+                        print('Evolution UID:', evo_uid)
+                    else:
+                        print(evo_uid)
+        except OSError as e:
+            util.die(__package__, e)
+    else:
+        try:
+            # outputs are returned in task order, whatever the number of
+            # jobs
+            for _, task_outputs in results:
+                for output in task_outputs:
+                    if args.save and args.verbose:
+                        print('Evolution UID:', output)
+                    else:
+                        print(output)
+            if args.resume:
+                manifest.close()
+        except OSError as e:
+            util.die(__package__, e)
+
+    if args.adaptive is not None and args.verbose:
+        print_intervals(adaptive_sweep)
+
+
+def sweep_manifest(args, graph, zeroes) -> dict:
+    """
+    Return the parameters identifying a sweep, i.e. everything the saved
+    evolutions depend on, see `manifest.Manifest`.
+
+    Parameters:
+        * args (argparse.Namespace): parsed command line arguments
+        * graph (CSRGraph|None): input graph, or None if it is loaded by a
+          simulation server
+        * zeroes (Iterable): initially infectious nodes
+
+    Raises:
+        * OSError: if the graph UID can't be resolved
+    """
+    if graph is not None:
+        graph_uid = graph.name
+    else:
+        graph_path = util.uid_to_path(args.graph_dir, args.graph_uid)
+        graph_uid = os.path.splitext(os.path.basename(graph_path))[0]
+    return {
+        'graph': graph_uid,
+        'edges': args.edges,
+        'numeric': args.numeric,
+        'probabilities': [float(prob) for prob in args.probability],
+        'count': args.count,
+        'seed': args.seed,
+        'zeroes': sorted({str(zero) for zero in zeroes}),
+        'random-zeroes': args.random_zeroes,
+        'infection': args.infection,
+        'recovery': args.recovery,
+        'engine': None if args.batch else args.engine,
+        'batch': args.batch,
+        'format': args.format
+    }
+
+
+def load_inputs(args):
+    """
+    Load the input graph and the initially infectious nodes given on the
+    command line; node labels are converted to numbers as requested.
+
+    Parameters:
+        * args (argparse.Namespace): parsed command line arguments
+
+    Returns:
+        * tuple: graph (CSRGraph) and initially infectious nodes (set)
+    """
     # generate graph
     if args.graph_uid:
         try:
             graph_path = util.uid_to_path(args.graph_dir, args.graph_uid)
-            graph_uid = os.path.splitext(os.path.basename(graph_path))[0]
-            with open(graph_path) as f:
-                graph_lines = f.readlines()
+            # compiled graph is cached in the graph directory
+            g = load_graph(graph_path, args.edges)
         except OSError as e:
             util.die(__package__, e)
     else:
@@ -137,11 +499,12 @@ def main():
         graph_uid = hashlib.sha1(bytes(''.join(graph_lines),
                 encoding='utf-8')).hexdigest()
 
-    if args.edges:
-        g = nx.parse_edgelist(graph_lines)
-    else:
-        g = nx.parse_adjlist(graph_lines)
-    g.name = graph_uid
+        if args.edges:
+            g = nx.parse_edgelist(graph_lines)
+        else:
+            g = nx.parse_adjlist(graph_lines)
+        g.name = graph_uid
+        g = CSRGraph.from_networkx(g)
 
     # infectious nodes:
     if args.zero is not None:
@@ -149,9 +512,9 @@ def main():
         zeroes = set(x for x in args.zero.split(',') if x in g)
     elif args.random_zeroes is not None:
         # choose randomly later on
-        if args.random_zeroes < 0 or args.random_zeroes > len(g.nodes):
+        if args.random_zeroes < 0 or args.random_zeroes > len(g):
             util.die(__package__, ValueError(
-                "random zeroes: NUM must be in range [0, %s]" % len(g.nodes)))
+                "random zeroes: NUM must be in range [0, %s]" % len(g)))
         zeroes = set()
     else:
         # read from file
@@ -160,68 +523,122 @@ def main():
 
     # numeric conversion
     if args.numeric != 'never':
-        subs = util.map_to_int(g.nodes, args.numeric == 'always')
-        g = nx.relabel_nodes(g, subs)
+        subs = util.map_to_int(g.labels, args.numeric == 'always')
+        g = g.relabel(subs)
         zeroes.update({subs[label] for label in subs if label in zeroes})
         zeroes.difference_update(subs)
 
-    if args.save:
-        try:
-            evo_dir = util.make_dir_check_writable(args.evolution_dir)
-        except OSError as e:
-            util.die(__package__, e)
+    return g, zeroes
 
-        if args.verbose:
-            print('Evolution dir:', evo_dir)
 
-    for prob in args.probability:
-        for _ in range(args.count):
-            # choose zeroes
-            if args.random_zeroes is not None:
-                zeroes = set(random.sample([*g.nodes], args.random_zeroes))
+def print_summaries(results, curves=False):
+    """
+    Write summaries to standard output as tab separated values, with a header
+    line; evolutions are numbered from zero, in task order.
 
-            evo_uid = make_evolution(
-                    g, zeroes, prob, args.infection,
-                    args.recovery, args.save, args.evolution_dir)
+    Parameters:
+        * results (Iterable): sweep tasks and their summaries, as tuples
+        * curves (bool): if True, write node counts of every round; else,
+          write one line per evolution
+    """
+    if curves:
+        print('run', 'probability', 'round', 'susceptible', 'infectious',
+              'recovered', sep='\t')
+    else:
+        print('run', 'probability', 'duration', 'infections', 'peak',
+              'peak-round', sep='\t')
+    run = 0
+    for (probability, _, _), summaries in results:
+        for summary in summaries:
+            if curves:
+                for round_n, (s, i, r) in enumerate(summary.counts.tolist()):
+                    print(run, probability, round_n, s, i, r, sep='\t')
+            else:
+                print(run, probability, summary.duration, summary.infections,
+                      summary.peak, summary.peak_round, sep='\t')
+            run += 1
 
-            if args.save:
-                if args.verbose:
-                    print('Evolution UID:', evo_uid)
-                else:
-                    print(evo_uid)
+
+def print_intervals(adaptive_sweep):
+    """
+    Write the evolution count and the confidence interval of the attack rate
+    of each probability of an adaptive sweep to standard error, as tab
+    separated values, with a header line.
+
+    Parameters:
+        * adaptive_sweep (AdaptiveSweep): sweep, run to the end
+    """
+    print('probability', 'count', 'low', 'high', sep='\t', file=sys.stderr)
+    for probability, rates in adaptive_sweep.rates.items():
+        low, high = adaptive_sweep.interval(probability)
+        print(probability, len(rates), '%.6g' % low, '%.6g' % high,
+              sep='\t', file=sys.stderr)
+
+
+def print_percolation(graph, zeroes, probabilities, count, random_zeroes=None,
+        seed=None):
+    """
+    Write final outbreak sizes to standard output as tab separated values,
+    with a header line; lines are sorted by probability, then by run.
+
+    Parameters:
+        * graph (CSRGraph): network to use for infection spreading
+        * zeroes (set): initially infectious nodes
+        * probabilities (Iterable): infection probabilities
+        * count (int): number of runs
+        * random_zeroes (int|None): if not None, choose this many initially
+          infectious nodes randomly for each run, ignoring `zeroes`
+        * seed (int|None): random generator seed; if None, use fresh entropy
+    """
+    sizes = []
+    for ss in np.random.SeedSequence(seed).spawn(count):
+        rng = np.random.default_rng(ss)
+        if random_zeroes is not None:
+            chosen = rng.choice(len(graph), random_zeroes, replace=False)
+            zeroes = {graph.labels[k] for k in chosen.tolist()}
+        sizes.append(Percolation(graph, zeroes, probabilities, rng).sizes)
+
+    print('run', 'probability', 'infections', sep='\t')
+    for j, probability in enumerate(probabilities):
+        for run, run_sizes in enumerate(sizes):
+            print(run, probability, run_sizes[j], sep='\t')
 
 
 def make_evolution(
         graph, zeroes, infection_probability, infection_duration=1,
-        recovery_duration=None, save=False, evolution_dir=os.path.curdir):
+        recovery_duration=None, save=False, evolution_dir=os.path.curdir,
+        engine=Engine.SET, seed=None, fmt=storage.Format.JSON):
 
-    evolution = Evolution(
-            graph, zeroes, infection_probability,
-            infection_duration, recovery_duration)
+    if fmt is storage.Format.NDJSON:
+        # write rounds while they are computed
+        evolution = engine.value['class'](
+                graph, zeroes, infection_probability,
+                infection_duration, recovery_duration, seed, lazy=True)
+        stream_args = (graph.name, infection_probability, evolution.zeroes,
+                evolution.transitions())
+        try:
+            if save:
+                return storage.stream_evolution(*stream_args, evolution_dir)
+            storage.write_ndjson(sys.stdout, *stream_args)
+            return None
+        except OSError as e:
+            util.die(__package__, e)
 
-    evo_data = {}
-    evo_data['graph-uid'] = graph.name
-    evo_data['probability'] = infection_probability
-    evo_data['rounds'] = evolution.rounds
-    txt = json.dumps(evo_data)
+    evolution = engine.value['class'](
+            graph, zeroes, infection_probability,
+            infection_duration, recovery_duration, seed)
 
     if save:
-        # evolution UID consists of:
-        # - a fixed graph UID prefix
-        # - a random and (hopefully) unique string
-        evo_uid = "%s-%s" % (graph.name[:8], uuid.uuid4().hex)
-        evo_name = "%s.json" % evo_uid
-        evo_path = os.path.join(evolution_dir, evo_name)
-
+        labels = graph.labels if isinstance(graph, CSRGraph) else [*graph]
         try:
-            with open(evo_path, 'w') as f:
-                f.write(txt)
+            return storage.save_evolution(
+                    graph.name, infection_probability, evolution.rounds,
+                    evolution_dir, fmt, labels)
         except OSError as e:
             util.die(__package__, e)
-
-        return evo_uid
     else:
-        print(txt)
+        print(storage.dumps_evolution(
+                graph.name, infection_probability, evolution.rounds, fmt))
         return None
 
 
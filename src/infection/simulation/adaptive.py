@@ -0,0 +1,208 @@
+import math
+import statistics
+
+import numpy as np
+
+from . import sweep
+
+
+# least evolutions of a probability before its interval is trusted
+MIN_COUNT = 10
+
+
+def confidence_interval(values, level: float = .95,
+        quantile: float = None) -> tuple:
+    """
+    Return a confidence interval of the mean of values, from the Student t
+    distribution, or of a quantile of values, from order statistics.
+
+    Values must lie in range [0, 1], and so do the bounds. If the sample
+    doesn't vary (the values bounding a quantile are equal), the interval
+    follows the rule of three instead: after n equal values, a different
+    value has probability up to -ln(1 - level) / n, and may move the mean
+    (or the quantile) as much; so samples that happen not to vary don't give
+    a zero-width interval.
+
+    Parameters:
+        * values (Iterable): samples
+        * level (float): confidence level, in range (0, 1)
+        * quantile (float|None): if not None, the quantile, in range [0, 1],
+          to estimate instead of the mean
+
+    Returns:
+        * tuple: lower and upper bound; infinite if there are too few
+          samples
+    """
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    n = len(values)
+    if n < 2:
+        return -math.inf, math.inf
+    # half width of samples not varying
+    rule_of_three = -math.log(1 - level) / n
+    if quantile is None:
+        # scipy is imported only for adaptive sweeps
+        from scipy.stats import t
+        mean = values.mean()
+        if values[0] == values[-1]:
+            half = rule_of_three
+        else:
+            half = t.ppf((1 + level) / 2, n - 1) * values.std(ddof=1) \
+                / math.sqrt(n)
+        return max(mean - half, 0.), min(mean + half, 1.)
+
+    # ranks of the bounds, binomially distributed around n * quantile
+    z = statistics.NormalDist().inv_cdf((1 + level) / 2)
+    spread = z * math.sqrt(n * quantile * (1 - quantile))
+    low = math.floor(n * quantile - spread)
+    high = math.ceil(n * quantile + spread)
+    if low < 0 or high > n - 1:
+        return -math.inf, math.inf
+    low, high = float(values[low]), float(values[high])
+    if low == high:
+        low, high = low - rule_of_three, high + rule_of_three
+    return max(low, 0.), min(high, 1.)
+
+
+class AdaptiveSweep:
+
+    def __init__(self, probabilities, width: float, min_count: int,
+            max_count: int, level: float = .95, quantile: float = None,
+            seed: int = None, batch: bool = False):
+        """
+        Sweep adding evolutions to each probability until the confidence
+        interval of the attack rate (i.e. final size over number of nodes)
+        is narrow enough.
+
+        Evolutions are added in waves: every probability starts with the
+        minimum count, then each wave adds as many evolutions as the current interval width
+        suggests, at most doubling the count, to the probabilities still too
+        wide. Easy probabilities stop early, and the evolutions go where the
+        attack rate varies most, e.g. near the epidemic threshold.
+
+        Every evolution gets a seed derived from the sweep seed, its
+        probability and its number, so results do not depend on how tasks
+        are scheduled.
+
+        Parameters:
+            * probabilities (Iterable): infection probabilities
+            * width (float): target width of the confidence intervals
+            * min_count (int): evolutions of each probability at least; at
+              least `MIN_COUNT`
+            * max_count (int): evolutions of each probability at most
+            * level (float): confidence level, in range (0, 1)
+            * quantile (float|None): if not None, target the interval of
+              this quantile of the attack rate instead of its mean
+            * seed (int|None): sweep seed; if None, use fresh entropy
+            * batch (bool): whether the evolutions a wave adds to a
+              probability are run by a single task
+
+        Attributes:
+            * tasks (list): tasks scheduled so far, see `sweep.make_tasks()`
+            * rates (dict): attack rates (list) by probability
+
+        Raises:
+            * ValueError: if `min_count` is less than `MIN_COUNT`, or
+              `max_count` is less than `min_count`
+        """
+        if min_count < MIN_COUNT or max_count < min_count:
+            raise ValueError("counts must be in range [%d, %d]"
+                    % (MIN_COUNT, max_count))
+        self.width = width
+        self.min_count = min_count
+        self.max_count = max_count
+        self.level = level
+        self.quantile = quantile
+        self.batch = batch
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.tasks = []
+        self.rates = {float(prob): [] for prob in probabilities}
+        # evolutions scheduled by probability
+        self.__scheduled = dict.fromkeys(self.rates, 0)
+
+    def interval(self, probability: float) -> tuple:
+        """Return the confidence interval of a probability so far."""
+        return confidence_interval(self.rates[probability], self.level,
+                self.quantile)
+
+    def next_tasks(self) -> list:
+        """
+        Schedule the next wave of tasks, after the results of the previous
+        ones were added, see `add()`.
+
+        Returns:
+            * list: tasks; empty when the sweep is over
+        """
+        tasks = []
+        for j, prob in enumerate(self.rates):
+            count = self.__scheduled[prob]
+            added = self._wave_size(prob)
+            if not added:
+                continue
+            if self.batch:
+                tasks.append((prob, added, self._seed(j, count)))
+            else:
+                tasks += [(prob, 1, self._seed(j, count + k))
+                          for k in range(added)]
+            self.__scheduled[prob] += added
+        self.tasks += tasks
+        return tasks
+
+    def add(self, task: tuple, rates: list):
+        """
+        Add the attack rates of the evolutions of a task.
+
+        Parameters:
+            * task (tuple): task from `next_tasks()`
+            * rates (list): attack rate of each evolution of the task
+        """
+        self.rates[task[0]] += rates
+
+    def _wave_size(self, prob: float) -> int:
+        count = len(self.rates[prob])
+        if count < self.min_count:
+            return self.min_count - count
+        low, high = self.interval(prob)
+        width = high - low
+        if width <= self.width or count >= self.max_count:
+            return 0
+        if math.isinf(width):
+            added = count
+        else:
+            # interval width shrinks as the square root of the count
+            needed = math.ceil(count * (width / self.width) ** 2)
+            added = min(max(needed - count, math.ceil(count / 4)), count)
+        return min(added, self.max_count - count)
+
+    def _seed(self, j: int, k: int) -> int:
+        # seed of evolution k of probability j
+        ss = np.random.SeedSequence(self.entropy, spawn_key=(j, k))
+        return int(ss.generate_state(1, np.uint64)[0])
+
+
+def run(graph, adaptive_sweep: AdaptiveSweep, jobs: int = 1, **params):
+    """
+    Run an adaptive sweep, one wave of tasks at a time, see `sweep.run()`;
+    all the waves share the same worker processes.
+
+    Parameters:
+        * graph (networkx.Graph|CSRGraph): network to use for infection
+          spreading; it must be compiled if `jobs` is larger than one
+        * adaptive_sweep (AdaptiveSweep): sweep to run
+        * jobs (int): number of worker processes
+        * params (dict): evolution parameters, see `sweep.run()`
+
+    Yields:
+        * tuple: task, and its evolution UIDs, summaries or serialized
+          evolutions (list), in the order tasks are scheduled
+    """
+    nodes = len(graph)
+    with sweep.runner(graph, jobs, sizes=True, **params) as run_tasks:
+        while True:
+            tasks = adaptive_sweep.next_tasks()
+            if not tasks:
+                return
+            start = len(adaptive_sweep.tasks) - len(tasks)
+            for task, (outputs, sizes) in zip(tasks,
+                    run_tasks(tasks, start)):
+                adaptive_sweep.add(task, [size / nodes for size in sizes])
+                yield task, outputs
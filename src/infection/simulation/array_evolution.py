@@ -0,0 +1,175 @@
+import collections
+import time
+
+import numpy as np
+
+from ..csr import CSRGraph
+from ..node import State
+from ..rounds import Rounds
+from .observer import RoundStats
+from .summary import Summary
+
+
+_S = State.SUSCEPTIBLE.value['code']
+_I = State.INFECTIOUS.value['code']
+_R = State.RECOVERED.value['code']
+
+
+class ArrayEvolution:
+
+    def __init__(self, graph, zeroes, contagion_probability:float,
+            infection_duration:int=1, recovery_duration:int=None,
+            seed=None, lazy:bool=False, summary:bool=False,
+            binomial:bool=False, observer=None):
+        """
+        Random infection evolution, computed over a compiled graph.
+
+        Same model and same output as `Evolution`, but node states are kept
+        in arrays indexed by node, and neighbors are read from CSR arrays.
+
+        Parameters:
+            * graph (networkx.Graph|CSRGraph): network to use for infection
+              spreading; a networkx graph is compiled first
+            * zeroes (iterable): initially infectious graph nodes
+            * contagion_probability (float): probability an infectious node
+              has to infect a susceptible neighbor on each round
+            * infection_duration (int): how many rounds a node is infectious
+              after being infected (starting from the next round)
+            * recovery_duration (int|None): how many rounds a recovered node
+              is immune; if None, a recovered node will not become
+              susceptible again
+            * seed (int|None): random generator seed; if None, use fresh
+              entropy
+            * lazy (bool): if True, rounds are neither computed nor
+              recorded here: iterate over `transitions()` to compute them
+              one at a time
+            * summary (bool): if True, record how many nodes are in each
+              state on each round, instead of which ones
+            * binomial (bool): if True, draw once per susceptible node
+              instead of once per edge: a node with k infectious neighbors
+              is infected with probability 1 - (1 - p)^k, which is
+              statistically the same
+            * observer (Observer|None): if not None, its `on_round()` method
+              is called after each round, with the round statistics
+
+        Attributes:
+            * zeroes (list): initially infectious nodes
+            * rounds (Rounds|None): sequence of rounds; each round is a
+              dictionary with two keys:
+                - 'i': list of infectious nodes
+                - 'r': list of recovered nodes
+              None if `lazy` or `summary` is True
+            * summary (Summary|None): node counts on each round; None unless
+              `summary` is True
+        """
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_networkx(graph)
+        self.__graph = graph
+        self.__rng = np.random.default_rng(seed)
+        self.__contagion_probability = contagion_probability
+        self.__infection_duration = infection_duration
+        self.__recovery_duration = recovery_duration
+        self.__binomial = binomial
+        self.__observer = observer
+
+        # init node states
+        self.__state = np.full(len(graph), _S, dtype=np.uint8)
+        # round when the current state ends
+        self.__state_end = np.zeros(len(graph), dtype=np.int32)
+        self.__infectious = np.fromiter({graph.index[z] for z in zeroes},
+                dtype=np.int32)
+        self.__state[self.__infectious] = _I
+        self.__state_end[self.__infectious] = infection_duration
+        # nodes whose current state ends, by round
+        self.__expiring = collections.defaultdict(list)
+        self.__expiring[infection_duration].append(self.__infectious)
+        self.__round_n = 0
+        self.zeroes = [graph.labels[k] for k in self.__infectious.tolist()]
+
+        self.rounds = self.summary = None
+        if summary and not lazy:
+            # node indices are never converted to labels
+            self.summary = Summary(len(graph), len(self.zeroes))
+            for delta in self._steps():
+                self.summary.append(*(nodes.size for nodes in delta))
+        elif not lazy:
+            # save initial round, then all the others
+            self.rounds = Rounds(self.zeroes)
+            for delta in self.transitions():
+                self.rounds.append(*delta)
+
+    def transitions(self):
+        """
+        Compute the evolution, one round at a time, until no node is
+        infectious; only the current node states are kept in memory.
+
+        Yields:
+            * tuple: nodes becoming infectious, recovered and susceptible,
+              for each round after the initial one
+        """
+        labels = self.__graph.labels
+        for delta in self._steps():
+            yield tuple([labels[k] for k in nodes.tolist()]
+                    for nodes in delta)
+
+    def _steps(self):
+        # same as transitions(), but yielding node indices
+        graph, rng = self.__graph, self.__rng
+        contagion_probability = self.__contagion_probability
+        infection_duration = self.__infection_duration
+        recovery_duration = self.__recovery_duration
+        state, state_end = self.__state, self.__state_end
+        expiring = self.__expiring
+
+        while self.__infectious.size:
+            # 1. infectious nodes try to infect susceptible neighbors
+            start = time.perf_counter()
+            self.__round_n += 1
+            round_n = self.__round_n
+            neighs = graph.neighbors(self.__infectious)
+            probed = neighs.size
+            neighs = neighs[state[neighs] == _S]
+            if self.__binomial:
+                # one draw per susceptible node, with k infectious neighbors
+                neighs, k = np.unique(neighs, return_counts=True)
+                draws = neighs.size
+                infected = neighs[rng.random(draws) <
+                        1 - (1 - contagion_probability) ** k]
+            else:
+                # one draw per (infectious, susceptible) edge
+                draws = neighs.size
+                neighs = neighs[rng.random(draws) < contagion_probability]
+                infected = np.unique(neighs)
+            middle = time.perf_counter()
+
+            # 2. node states are updated for the next round; only nodes
+            #    changing state are visited
+            ending = expiring.pop(round_n, [])
+            ending = np.concatenate(ending) if ending else infected[:0]
+            ending = ending[state_end[ending] == round_n]
+            recovered = ending[state[ending] == _I]
+            susceptible = ending[state[ending] == _R]
+            # susceptible node becomes infected
+            state[infected] = _I
+            state_end[infected] = round_n + infection_duration
+            expiring[round_n + infection_duration].append(infected)
+            # infectious node becomes recovered
+            state[recovered] = _R
+            if recovery_duration:
+                state_end[recovered] = round_n + recovery_duration
+                expiring[round_n + recovery_duration].append(recovered)
+            # recovered node becomes susceptible
+            state[susceptible] = _S
+
+            infectious = self.__infectious
+            self.__infectious = np.concatenate((
+                infectious[state[infectious] == _I], infected))
+
+            if self.__observer is not None:
+                self.__observer.on_round(RoundStats(round_n, infectious.size,
+                        probed, draws, infected.size, recovered.size,
+                        susceptible.size, middle - start,
+                        time.perf_counter() - middle))
+
+            # current round
+            yield infected, recovered, susceptible
@@ -0,0 +1,135 @@
+import numpy as np
+import scipy.sparse
+
+from ..csr import CSRGraph
+from ..node import State
+from ..rounds import Rounds
+from .summary import Summary
+
+
+_S = State.SUSCEPTIBLE.value['code']
+_I = State.INFECTIOUS.value['code']
+_R = State.RECOVERED.value['code']
+
+
+class BatchEvolution:
+
+    def __init__(self, graph, zeroes: list, contagion_probability:float,
+            infection_duration:int=1, recovery_duration:int=None,
+            record:bool=True, seed=None):
+        """
+        Many random infection evolutions over the same graph, advanced in
+        lockstep.
+
+        Node states of all the replicas are kept in a (replicas x nodes)
+        matrix; on each round, infectious neighbors are counted for all the
+        replicas at once with a sparse matrix product, and a susceptible
+        node with k infectious neighbors is infected with probability
+        1 - (1 - p)^k, which is the same as drawing once per edge. Replicas
+        whose infection has died out are left out of later rounds.
+
+        Parameters:
+            * graph (networkx.Graph|CSRGraph): network to use for infection
+              spreading; a networkx graph is compiled first
+            * zeroes (list): initially infectious graph nodes of each
+              replica; the number of replicas is the length of this list
+            * contagion_probability (float): probability an infectious node
+              has to infect a susceptible neighbor on each round
+            * infection_duration (int): how many rounds a node is infectious
+              after being infected (starting from the next round)
+            * recovery_duration (int|None): how many rounds a recovered node
+              is immune; if None, a recovered node will not become
+              susceptible again
+            * record (bool): whether to record the rounds of each replica;
+              if False, only node counts are kept
+            * seed (int|None): random generator seed; if None, use fresh
+              entropy
+
+        Attributes:
+            * rounds (list): rounds of each replica, as `Rounds`; empty if
+              `record` is False
+            * counts (numpy.ndarray): number of susceptible, infectious and
+              recovered nodes, with shape (replicas, rounds, 3); after its
+              last round, the counts of a replica are repeated
+            * durations (numpy.ndarray): number of rounds of each replica
+            * summaries (list): node counts of each replica, as `Summary`
+        """
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_networkx(graph)
+        rng = np.random.default_rng(seed)
+        replicas, nodes = len(zeroes), len(graph)
+        adjacency = scipy.sparse.csr_array(
+                (np.ones(len(graph.indices), dtype=np.float32),
+                    graph.indices, graph.indptr), shape=(nodes, nodes))
+        labels = graph.labels
+
+        # init node states
+        state = np.full((replicas, nodes), _S, dtype=np.uint8)
+        # round when the current state ends
+        state_end = np.zeros((replicas, nodes), dtype=np.int32)
+        for row, row_zeroes in enumerate(zeroes):
+            infectious = [graph.index[z] for z in row_zeroes]
+            state[row, infectious] = _I
+            state_end[row, infectious] = infection_duration
+
+        # save initial round
+        self.rounds = [Rounds(labels[k] for k in
+                              np.flatnonzero(row == _I).tolist())
+                       for row in state] if record else []
+        counts = [_count(state)]
+        infections = counts[0][:, 1].copy()
+        self.durations = np.ones(replicas, dtype=np.int64)
+
+        # replicas still having infectious nodes
+        active = np.flatnonzero((state == _I).any(axis=1))
+        while active.size:
+            # 1. infectious nodes try to infect susceptible neighbors
+            round_n = len(counts)
+            sub_state = state[active]
+            sub_end = state_end[active]
+            infectious = (sub_state == _I).astype(np.float32)
+            exposure = (adjacency @ infectious.T).T
+            infected = (sub_state == _S) & (rng.random(exposure.shape) <
+                    1 - (1 - contagion_probability) ** exposure)
+
+            # 2. node states are updated for the next round
+            recovered = (sub_state == _I) & (sub_end == round_n)
+            if recovery_duration:
+                susceptible = (sub_state == _R) & (sub_end == round_n)
+            else:
+                susceptible = np.zeros_like(recovered)
+            # susceptible node becomes infected
+            sub_state[infected] = _I
+            sub_end[infected] = round_n + infection_duration
+            # infectious node becomes recovered
+            sub_state[recovered] = _R
+            if recovery_duration:
+                sub_end[recovered] = round_n + recovery_duration
+            # recovered node becomes susceptible
+            sub_state[susceptible] = _S
+            state[active] = sub_state
+            state_end[active] = sub_end
+
+            # save current round
+            if record:
+                for row, replica in enumerate(active):
+                    self.rounds[replica].append(*([labels[k] for k in
+                        np.flatnonzero(mask[row]).tolist()]
+                        for mask in (infected, recovered, susceptible)))
+            round_counts = counts[-1].copy()
+            round_counts[active] = _count(sub_state)
+            counts.append(round_counts)
+            infections[active] += infected.sum(axis=1)
+            self.durations[active] += 1
+            active = active[(sub_state == _I).any(axis=1)]
+
+        self.counts = np.stack(counts, axis=1)
+        self.summaries = [Summary.from_counts(row[:duration], total)
+                          for row, duration, total in
+                          zip(self.counts, self.durations, infections)]
+
+
+def _count(state: np.ndarray) -> np.ndarray:
+    """Return susceptible, infectious and recovered nodes of each row."""
+    return np.stack([(state == code).sum(axis=1)
+                     for code in (_S, _I, _R)], axis=1)
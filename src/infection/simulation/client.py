@@ -0,0 +1,99 @@
+import errno
+import json
+import os
+import socket
+
+import numpy as np
+
+from .summary import Summary
+
+
+def submit(path: str, graph_uid: str, tasks: list, graph_dir: str = 'graphs',
+        edges: bool = False, numeric: str = 'auto', **params):
+    """
+    Submit a sweep to a simulation server, see `server.Server`; the graph is
+    loaded by the server, and kept in memory for later jobs.
+
+    Parameters:
+        * path (str): server socket path
+        * graph_uid (str): graph UID, or a prefix of it
+        * tasks (list): tasks from `sweep.make_tasks()`
+        * graph_dir (str): graph directory
+        * edges (bool): whether the graph file is an edge list
+        * numeric (str): when node labels are treated as numbers, i.e.
+          'always', 'never' or 'auto' (if all of them can be)
+        * params (dict): evolution parameters, see `sweep.run()`; initially
+          infectious nodes are given by their original label
+
+    Returns:
+        * tuple: graph name (str), and an Iterator over the outputs of each
+          task, in task order, as `sweep.run()` returns them
+
+    Raises:
+        * OSError: if the server can't be reached or the graph can't be
+          loaded; later, while iterating outputs, if a task fails
+        * ValueError: if parameters are not valid for the graph
+    """
+    # paths are resolved by the server, whatever its working directory
+    request = {
+        'graph_dir': os.path.abspath(graph_dir),
+        'graph_uid': graph_uid,
+        'edges': edges,
+        'numeric': numeric,
+        'tasks': tasks,
+        'zeroes': [str(zero) for zero in params['zeroes']],
+        'random_zeroes': params['random_zeroes'],
+        'infection_duration': params['infection_duration'],
+        'recovery_duration': params['recovery_duration'],
+        'engine': params['engine'].name,
+        'batch': params['batch'],
+        'save': params['save'],
+        'evolution_dir': os.path.abspath(params['evolution_dir']),
+        'fmt': params['fmt'].name,
+        'summary': params['summary'],
+        'metrics_dir': None if params['metrics_dir'] is None
+                       else os.path.abspath(params['metrics_dir']),
+        'sweep_id': params.get('sweep_id')
+    }
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise ConnectionRefusedError(e.errno,
+                    "No simulation server listening on '%s'" % path)
+        f = sock.makefile('rw', encoding='utf-8')
+        f.write(json.dumps(request) + '\n')
+        f.flush()
+        header = _receive(f)
+        if 'error' in header:
+            exc_type = ValueError if header['type'] == 'ValueError' \
+                else OSError
+            raise exc_type(header['error'])
+    except BaseException:
+        sock.close()
+        raise
+    return header['graph'], _outputs(sock, f, len(tasks), params['summary'])
+
+
+def _receive(f) -> dict:
+    line = f.readline()
+    if not line:
+        raise ConnectionResetError(errno.ECONNRESET,
+                'Connection closed by the simulation server')
+    return json.loads(line)
+
+
+def _outputs(sock, f, count: int, summary: bool):
+    with sock, f:
+        for _ in range(count):
+            message = _receive(f)
+            if 'error' in message:
+                raise OSError(message['error'])
+            if summary:
+                yield [Summary.from_counts(np.array(output['counts'],
+                        dtype=np.int64).reshape(-1, 3), output['infections'])
+                       for output in message['outputs']]
+            else:
+                yield message['outputs']
@@ -0,0 +1,31 @@
+import enum
+import functools
+
+from .array_evolution import ArrayEvolution
+from .evolution import Evolution
+
+
+class Engine(enum.Enum):
+
+    SET = {
+        'help': "Node states kept in sets, neighbors read from the networkx " \
+                "graph; suitable for small graphs.",
+        'class': Evolution,
+        'compiled': False
+    }
+
+    ARRAY = {
+        'help': "Node states kept in arrays, neighbors read from the graph " \
+                "compiled to CSR arrays; suitable for large graphs.",
+        'class': ArrayEvolution,
+        'compiled': True
+    }
+
+    BINOMIAL = {
+        'help': "Same as ARRAY, but a susceptible node with k infectious " \
+                "neighbors is infected with probability 1 - (1 - p)^k, " \
+                "drawn once per node instead of once per edge; fastest on " \
+                "dense graphs.",
+        'class': functools.partial(ArrayEvolution, binomial=True),
+        'compiled': True
+    }
@@ -1,9 +1,17 @@
+import collections
 import random
+import time
+
+from ..rounds import Rounds
+from .observer import RoundStats
+from .summary import Summary
 
 class Evolution:
 
     def __init__(self, graph, zeroes, contagion_probability:float,
-            infection_duration:int=1, recovery_duration:int=None):
+            infection_duration:int=1, recovery_duration:int=None,
+            seed=None, lazy:bool=False, summary:bool=False,
+            observer=None):
         """
         Random infection evolution.
 
@@ -17,24 +25,72 @@ class Evolution:
             * recovery_duration (int|None): how many rounds a recovered node
               is immune; if None, a recovered node will not become
               susceptible again
+            * seed (int|None): random generator seed; if None, use fresh
+              entropy
+            * lazy (bool): if True, rounds are neither computed nor
+              recorded here: iterate over `transitions()` to compute them
+              one at a time
+            * summary (bool): if True, record how many nodes are in each
+              state on each round, instead of which ones
+            * observer (Observer|None): if not None, its `on_round()` method
+              is called after each round, with the round statistics
 
         Attributes:
-            * rounds (list): list of rounds; each round is a dictionary with
-              two keys:
+            * zeroes (list): initially infectious nodes, in graph order
+            * rounds (Rounds|None): sequence of rounds; each round is a
+              dictionary with two keys:
                 - 'i': list of infectious nodes
                 - 'r': list of recovered nodes
+              None if `lazy` or `summary` is True
+            * summary (Summary|None): node counts on each round; None unless
+              `summary` is True
         """
-        self.rounds = []
+        self.__graph = graph
+        self.__rng = random.Random(seed)
+        self.__contagion_probability = contagion_probability
+        self.__infection_duration = infection_duration
+        self.__recovery_duration = recovery_duration
+        self.__observer = observer
 
-        # init node states
+        # init node states; infectious nodes are iterated, so they are kept
+        # in insertion ordered dicts, not to make random draws depend on
+        # string hashing (i.e. on PYTHONHASHSEED)
+        zeroes = set(zeroes)
         self.__susceptible = set(graph).difference(zeroes)
-        self.__infectious = set(zeroes)
+        self.__infectious = dict.fromkeys(node for node in graph
+                                          if node in zeroes)
         self.__recovered = set()
-        # round when the current state ends
-        self.__state_end = dict.fromkeys(zeroes, infection_duration)
+        # nodes whose current state ends, by round
+        self.__state_end = collections.defaultdict(list)
+        self.__state_end[infection_duration].extend(self.__infectious)
+        self.__round_n = 0
+        self.zeroes = [*self.__infectious]
+
+        self.rounds = self.summary = None
+        if summary and not lazy:
+            self.summary = Summary(len(self.__susceptible) +
+                    len(self.__infectious), len(self.zeroes))
+            for delta in self.transitions():
+                self.summary.append(*map(len, delta))
+        elif not lazy:
+            # save initial round, then all the others
+            self.rounds = Rounds(self.zeroes)
+            for delta in self.transitions():
+                self.rounds.append(*delta)
 
-        # save initial round
-        self._save_round_states()
+    def transitions(self):
+        """
+        Compute the evolution, one round at a time, until no node is
+        infectious; only the current node states are kept in memory.
+
+        Yields:
+            * tuple: nodes becoming infectious, recovered and susceptible,
+              for each round after the initial one
+        """
+        graph, rng = self.__graph, self.__rng
+        contagion_probability = self.__contagion_probability
+        infection_duration = self.__infection_duration
+        recovery_duration = self.__recovery_duration
 
         # - the infection spreading consists of a sequence of rounds;
         # - each round consists of two phases:
@@ -42,40 +98,50 @@ class Evolution:
         #   2. update
         while self.__infectious:
             # 1. infectious nodes try to infect susceptible neighbors
-            round_n = len(self.rounds)
-            infected = set()
+            start = time.perf_counter()
+            self.__round_n += 1
+            round_n = self.__round_n
+            infected = {}
+            probed = draws = 0
             for i in self.__infectious:
-                for neigh in graph.neighbors(i):
-                    if neigh in self.__susceptible \
-                            and random.random() < contagion_probability:
-                        infected.add(neigh)
+                neighs = graph.adj[i]
+                probed += len(neighs)
+                for neigh in neighs:
+                    if neigh in self.__susceptible:
+                        draws += 1
+                        if rng.random() < contagion_probability:
+                            infected[neigh] = None
+            frontier = len(self.__infectious)
+            middle = time.perf_counter()
 
-            # 2. node states are updated for the next round
-            for node in graph.nodes:
-                # susceptible node becomes infected
-                if node in self.__susceptible and node in infected:
-                    self.__susceptible.remove(node)
-                    self.__infectious.add(node)
-                    self.__state_end[node] = round_n + infection_duration
+            # 2. node states are updated for the next round; only nodes
+            #    changing state are visited
+            recovered, susceptible = [], []
+            # susceptible node becomes infected
+            for node in infected:
+                self.__susceptible.remove(node)
+                self.__infectious[node] = None
+                self.__state_end[round_n + infection_duration].append(node)
+            for node in self.__state_end.pop(round_n, ()):
                 # infectious node becomes recovered
-                elif node in self.__infectious \
-                        and self.__state_end[node] == round_n:
-                    self.__infectious.remove(node)
+                if node in self.__infectious:
+                    del self.__infectious[node]
                     self.__recovered.add(node)
+                    recovered.append(node)
                     if recovery_duration:
-                        self.__state_end[node] = round_n + recovery_duration
+                        self.__state_end[round_n + recovery_duration] \
+                                .append(node)
                 # recovered node becomes susceptible
-                elif node in self.__recovered and recovery_duration \
-                        and self.__state_end[node] == round_n:
+                else:
                     self.__recovered.remove(node)
                     self.__susceptible.add(node)
-                    self.__state_end.pop(node)
+                    susceptible.append(node)
 
-            # save current round
-            self._save_round_states()
+            if self.__observer is not None:
+                self.__observer.on_round(RoundStats(round_n, frontier,
+                        probed, draws, len(infected), len(recovered),
+                        len(susceptible), middle - start,
+                        time.perf_counter() - middle))
 
-    def _save_round_states(self):
-        self.rounds.append({
-            'i': [*self.__infectious],
-            'r': [*self.__recovered]
-        })
+            # current round
+            yield [*infected], recovered, susceptible
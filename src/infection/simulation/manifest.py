@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import tempfile
+
+
+class Manifest:
+
+    def __init__(self, evolution_dir: str, sweep: dict):
+        """
+        Record of the finished tasks of a sweep, so that an interrupted sweep
+        is resumed instead of started again.
+
+        The manifest is a newline-delimited JSON file in the '.sweeps'
+        subdirectory of the evolution directory, named after the sweep ID:
+        the first line holds the sweep parameters, and each following line a
+        finished task, with its index, probability, seed and evolution UIDs.
+        A line left incomplete by an interrupted run is dropped.
+
+        Parameters:
+            * evolution_dir (str): evolution directory
+            * sweep (dict): parameters identifying the sweep, seed included;
+              they must be JSON serializable
+
+        Attributes:
+            * uid (str): sweep ID, i.e. the hash of the sweep parameters
+            * path (str): manifest file path
+            * finished (dict): recorded tasks, as tuples (seed, evolution
+              UIDs), by task index
+
+        Raises:
+            * OSError: if the manifest can't be read or written
+            * ValueError: if the manifest belongs to another sweep
+        """
+        header = json.dumps(sweep, sort_keys=True)
+        self.uid = hashlib.sha1(header.encode()).hexdigest()
+        sweep_dir = os.path.join(evolution_dir, '.sweeps')
+        os.makedirs(sweep_dir, exist_ok=True)
+        self.path = os.path.join(sweep_dir, self.uid + '.ndjson')
+        self.finished = {}
+
+        lines = [header + '\n']
+        try:
+            with open(self.path) as f:
+                if json.loads(f.readline()) != json.loads(header):
+                    raise ValueError("manifest '%s' belongs to another sweep"
+                            % self.path)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.finished[record['task']] = (record['seed'],
+                                record['uids'])
+                    except (ValueError, KeyError):
+                        # interrupted while writing
+                        break
+                    lines.append(line)
+        except FileNotFoundError:
+            pass
+
+        # rewrite valid lines only, so that records are appended safely
+        fd, tmp_path = tempfile.mkstemp(dir=sweep_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.writelines(lines)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.__file = open(self.path, 'a')
+
+    def pending(self, tasks: list) -> list:
+        """
+        Return the tasks not recorded yet, in task order.
+
+        Parameters:
+            * tasks (list): sweep tasks, see `sweep.make_tasks()`
+
+        Raises:
+            * ValueError: if a recorded task has another seed
+        """
+        for index, (seed, _) in self.finished.items():
+            if index >= len(tasks) or tasks[index][2] != seed:
+                raise ValueError("manifest '%s' doesn't match task %d"
+                        % (self.path, index))
+        return [task for index, task in enumerate(tasks)
+                if index not in self.finished]
+
+    def record(self, index: int, task: tuple, uids: list):
+        """
+        Record a finished task.
+
+        Parameters:
+            * index (int): task index
+            * task (tuple): task, see `sweep.make_tasks()`
+            * uids (list): evolution UIDs of the task
+
+        Raises:
+            * OSError: if the manifest can't be written
+        """
+        prob, _, seed = task
+        self.__file.write(json.dumps({
+            'task': index,
+            'probability': prob,
+            'seed': seed,
+            'uids': uids
+        }) + '\n')
+        # a record must survive the process
+        self.__file.flush()
+        self.finished[index] = (seed, uids)
+
+    def merge(self, tasks: list, outputs):
+        """
+        Merge the outputs of the pending tasks with the recorded ones,
+        recording each pending task as its outputs come.
+
+        Parameters:
+            * tasks (list): all the sweep tasks
+            * outputs (Iterable): evolution UIDs of each pending task, in
+              task order, see `sweep.run()`
+
+        Yields:
+            * list: for each task, in task order, its evolution UIDs
+        """
+        outputs = iter(outputs)
+        for index, task in enumerate(tasks):
+            if index in self.finished:
+                yield self.finished[index][1]
+            else:
+                uids = next(outputs)
+                self.record(index, task, uids)
+                yield uids
+
+    def close(self):
+        """Close the manifest file."""
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
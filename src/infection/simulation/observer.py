@@ -0,0 +1,64 @@
+import collections
+
+
+# what happened on a round of an evolution:
+# - round: round number, starting from 1
+# - frontier: infectious nodes trying to infect their neighbors
+# - probed: edges from the frontier scanned for susceptible neighbors
+# - draws: random numbers drawn
+# - infected, recovered, susceptible: nodes changing state
+# - infection_time, update_time: seconds spent in the infection and in the
+#   update phase
+RoundStats = collections.namedtuple('RoundStats', ['round', 'frontier',
+        'probed', 'draws', 'infected', 'recovered', 'susceptible',
+        'infection_time', 'update_time'])
+
+
+class Observer:
+
+    def on_round(self, stats: RoundStats):
+        """
+        Called by an evolution after each round; this does nothing, override
+        it to collect the statistics.
+
+        Parameters:
+            * stats (RoundStats): round statistics
+        """
+
+
+class Metrics(Observer):
+
+    def __init__(self):
+        """
+        Observer recording the statistics of every round, see `RoundStats`.
+
+        Attributes:
+            * rounds (list): statistics of each round (RoundStats)
+        """
+        self.rounds = []
+
+    def on_round(self, stats: RoundStats):
+        self.rounds.append(stats)
+
+    def write(self, f):
+        """
+        Write the statistics of every round as tab separated values, with a
+        header line.
+
+        Parameters:
+            * f (file): text file to write to
+        """
+        f.write('\t'.join(field.replace('_', '-')
+                          for field in RoundStats._fields) + '\n')
+        for stats in self.rounds:
+            f.write('\t'.join(map(str, stats)) + '\n')
+
+    def save(self, path: str):
+        """
+        Write the statistics to a file, see `write()`.
+
+        Raises:
+            * OSError: if the file can't be written
+        """
+        with open(path, 'w') as f:
+            self.write(f)
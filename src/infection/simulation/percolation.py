@@ -0,0 +1,88 @@
+import numpy as np
+
+from ..csr import CSRGraph
+
+
+class Percolation:
+
+    def __init__(self, graph, zeroes, probabilities, seed=None):
+        """
+        Final outbreak sizes of an infection lasting one round, without
+        immunity loss, for many infection probabilities at once.
+
+        Such an infection tries each edge at most once, so the nodes it
+        reaches are the bond percolation clusters containing the zeroes,
+        with edges kept with probability p. Each edge gets a uniform random
+        weight, and it is kept at probability p if its weight is lower than
+        p; edges are added by increasing weight to a union-find forest
+        (Newman-Ziff), and the outbreak size is read whenever the number of
+        kept edges reaches the one of a probability. So, every probability
+        is covered in a single pass over the edges; the size at each
+        probability is distributed as the final size of `Evolution`, and
+        sizes at different probabilities come from the same edge weights.
+
+        Parameters:
+            * graph (networkx.Graph|CSRGraph): network to use for infection
+              spreading; a networkx graph is compiled first
+            * zeroes (iterable): initially infectious graph nodes
+            * probabilities (Iterable): infection probabilities, in any
+              order
+            * seed (int|numpy.random.Generator|None): random generator
+              seed; if None, use fresh entropy
+
+        Attributes:
+            * zeroes (list): initially infectious nodes
+            * probabilities (numpy.ndarray): infection probabilities
+            * sizes (numpy.ndarray): final outbreak size (i.e. number of
+              nodes ever infected, including the zeroes) at each probability
+        """
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_networkx(graph)
+        rng = np.random.default_rng(seed)
+        nodes = len(graph)
+        seeded = sorted({graph.index[z] for z in zeroes})
+        self.zeroes = [graph.labels[k] for k in seeded]
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+
+        # every undirected edge once, self-loops left out
+        heads = np.repeat(np.arange(nodes, dtype=np.int32), graph.degree())
+        tails = graph.indices
+        heads, tails = heads[heads < tails], tails[heads < tails]
+        # edge is kept at probability p if its weight is lower than p
+        weights = rng.random(heads.size)
+        order = np.argsort(weights)
+        kept = np.searchsorted(weights[order], self.probabilities)
+        heads, tails = heads[order].tolist(), tails[order].tolist()
+
+        # union-find forest: each root knows the size of its cluster and
+        # whether the cluster contains a zero
+        parent = list(range(nodes))
+        size = [1] * nodes
+        infected = [False] * nodes
+        for k in seeded:
+            infected[k] = True
+        total = len(seeded)
+
+        self.sizes = np.zeros(len(self.probabilities), dtype=np.int64)
+        edge = 0
+        for j in np.argsort(kept, kind='stable').tolist():
+            # add edges up to those kept at the j-th probability
+            while edge < kept[j] and seeded and total < nodes:
+                u, v = heads[edge], tails[edge]
+                edge += 1
+                # find roots, halving paths
+                while parent[u] != u:
+                    parent[u] = u = parent[parent[u]]
+                while parent[v] != v:
+                    parent[v] = v = parent[parent[v]]
+                if u == v:
+                    continue
+                # merge the smaller cluster into the larger one
+                if size[u] < size[v]:
+                    u, v = v, u
+                if infected[u] != infected[v]:
+                    total += size[v] if infected[u] else size[u]
+                parent[v] = u
+                size[u] += size[v]
+                infected[u] = infected[u] or infected[v]
+            self.sizes[j] = total
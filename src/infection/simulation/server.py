@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# vim: ts=8 et sw=4 sts=4
+"""
+Serve simulation jobs on a local Unix socket, keeping graphs loaded between
+jobs. Jobs are submitted by infection.simulation with option '--connect'.
+"""
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+
+from . import sweep
+from .engine import Engine
+from .. import storage
+from .. import util
+from ..csr import load_graph
+
+
+class GraphCache:
+
+    def __init__(self, capacity: int = 8):
+        """
+        Least recently used graphs, compiled and relabelled, by graph file
+        and loading options; a graph is loaded again when its file changes.
+
+        Parameters:
+            * capacity (int): number of graphs kept at most
+
+        Attributes:
+            * capacity (int): number of graphs kept at most
+        """
+        self.capacity = capacity
+        self.__graphs = collections.OrderedDict()
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.__graphs)
+
+    def get(self, path: str, edges: bool = False, numeric: str = 'auto',
+            networkx: bool = False) -> tuple:
+        """
+        Return a graph, loading it if missing.
+
+        Parameters:
+            * path (str): graph file path
+            * edges (bool): whether the graph file is an edge list
+            * numeric (str): when node labels are treated as numbers, i.e.
+              'always', 'never' or 'auto' (if all of them can be)
+            * networkx (bool): whether to return a networkx graph, for the
+              engines that need one
+
+        Returns:
+            * tuple: graph (CSRGraph|networkx.Graph), and numeric labels by
+              original node label (dict)
+
+        Raises:
+            * OSError: if the graph file can't be read
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns, edges, numeric,
+               networkx)
+        with self.__lock:
+            if key in self.__graphs:
+                self.__graphs.move_to_end(key)
+                return self.__graphs[key]
+
+            if networkx:
+                graph, subs = self.get(path, edges, numeric)
+                graph = graph.to_networkx()
+            else:
+                # compiled graph is cached in the graph directory
+                graph = load_graph(path, edges)
+                subs = {}
+                if numeric != 'never':
+                    subs = util.map_to_int(graph.labels, numeric == 'always')
+                    graph = graph.relabel(subs)
+            self.__graphs[key] = graph, subs
+            while len(self.__graphs) > self.capacity:
+                self.__graphs.popitem(last=False)
+            return graph, subs
+
+
+# graphs of a worker process
+_worker = {}
+
+
+def _init_worker(cache_size: int):
+    # interrupting the server stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker['graphs'] = GraphCache(cache_size)
+
+
+def _work(item: tuple) -> list:
+    (path, edges, numeric), params, index, task = item
+    compiled = params['batch'] or params['engine'].value['compiled']
+    graph, _ = _worker['graphs'].get(path, edges, numeric, not compiled)
+    return sweep.run_task(graph, task, index, **params)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # e.g. checking whether the server is running
+            return
+        try:
+            job = self.server.prepare(json.loads(line))
+            self.send({'graph': job['name'], 'nodes': job['nodes']})
+            for outputs in self.server.run(job):
+                self.send({'outputs': outputs})
+        except (BrokenPipeError, ConnectionResetError):
+            # client is gone
+            pass
+        except Exception as e:
+            try:
+                self.send({'error': str(e), 'type': type(e).__name__})
+            except OSError:
+                pass
+
+    def send(self, message: dict):
+        self.wfile.write(json.dumps(message).encode() + b'\n')
+        self.wfile.flush()
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    # connections still open don't keep the server alive
+    daemon_threads = True
+
+    def __init__(self, path: str, jobs: int = 1, cache_size: int = 8):
+        """
+        Simulation server, listening on a Unix socket. Every connection
+        submits a job, i.e. a sweep over a graph: the graph is loaded once,
+        then kept in memory, and the sweep tasks of all the jobs are run
+        concurrently on a pool of worker processes.
+
+        Each worker keeps its own graphs; compiled graphs are memory-mapped
+        from their cache file, so workers share most of their memory.
+
+        Parameters:
+            * path (str): socket path
+            * jobs (int): number of worker processes
+            * cache_size (int): number of graphs kept by each process
+
+        Attributes:
+            * graphs (GraphCache): graphs of the server process, used to
+              check jobs
+            * pool (multiprocessing.Pool): worker processes
+
+        Raises:
+            * OSError: if the socket can't be bound
+        """
+        self.graphs = GraphCache(cache_size)
+        # workers are started before the socket is open, not to inherit it
+        self.pool = multiprocessing.Pool(jobs, _init_worker, (cache_size,))
+        try:
+            super().__init__(path, _Handler)
+        except OSError:
+            self.pool.terminate()
+            raise
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+        self.pool.join()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+    def prepare(self, request: dict) -> dict:
+        """
+        Check a job request and resolve its graph and initially infectious
+        nodes, see `client.submit()` for the request fields.
+
+        Returns:
+            * dict: job graph key, name and number of nodes, tasks and
+              evolution parameters, see `sweep.run()`
+
+        Raises:
+            * OSError: if the graph can't be loaded
+            * ValueError: if the request is not valid
+        """
+        try:
+            engine = Engine[request['engine']]
+            fmt = storage.Format[request['fmt']]
+        except KeyError as e:
+            raise ValueError('unknown engine or format: %s' % e)
+        path = os.path.abspath(util.uid_to_path(request['graph_dir'],
+                request['graph_uid']))
+        graph, subs = self.graphs.get(path, request['edges'],
+                request['numeric'])
+
+        random_zeroes = request['random_zeroes']
+        if random_zeroes is not None and not 0 <= random_zeroes <= len(graph):
+            raise ValueError("random zeroes: NUM must be in range [0, %s]"
+                    % len(graph))
+        # nodes not in the graph are ignored
+        zeroes = {subs.get(zero, zero) for zero in request['zeroes']
+                  if zero in subs or zero in graph}
+
+        return {
+            'graph': (path, request['edges'], request['numeric']),
+            'name': graph.name,
+            'nodes': len(graph),
+            'tasks': [tuple(task) for task in request['tasks']],
+            'params': {
+                'zeroes': zeroes,
+                'random_zeroes': random_zeroes,
+                'infection_duration': request['infection_duration'],
+                'recovery_duration': request['recovery_duration'],
+                'engine': engine,
+                'batch': request['batch'],
+                'save': request['save'],
+                'evolution_dir': request['evolution_dir'],
+                'fmt': fmt,
+                'summary': request['summary'],
+                'metrics_dir': request['metrics_dir'],
+                'sweep_id': request.get('sweep_id')
+            }
+        }
+
+    def run(self, job: dict):
+        """
+        Run the tasks of a job on the worker pool.
+
+        Parameters:
+            * job (dict): job from `prepare()`
+
+        Yields:
+            * list: for each task, in task order, evolution UIDs (if
+              saved), summaries as dicts of counts and infections (if
+              `summary`), or serialized evolutions
+        """
+        items = [(job['graph'], job['params'], index, task)
+                 for index, task in enumerate(job['tasks'])]
+        for outputs in self.pool.imap(_work, items):
+            if job['params']['summary']:
+                outputs = [{'counts': summary.counts.tolist(),
+                            'infections': summary.infections}
+                           for summary in outputs]
+            yield outputs
+
+
+def remove_stale_socket(path: str):
+    """
+    Remove a socket file left behind by a server no longer running.
+
+    Raises:
+        * OSError: if a server is listening on the socket, or the file
+          can't be removed
+    """
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise OSError("a server is already listening on '%s'" % path)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog=__spec__.name, description=__doc__)
+    # socket path
+    parser.add_argument('socket', metavar='SOCKET',
+            help="""Listen on Unix socket SOCKET; a socket left behind by a
+            stopped server is replaced.""", type=str)
+    # number of worker processes
+    parser.add_argument('-j', '--jobs', metavar='NUM',
+            help="""Run evolutions on NUM worker processes, shared by all the
+            jobs. By default, NUM is the number of CPUs.""", type=int,
+            default=os.cpu_count())
+    # graphs kept in memory
+    parser.add_argument('--cache-size', metavar='NUM',
+            help="""Keep the NUM graphs used last in memory, in each
+            process. By default, NUM is 8.""", type=int, default=8)
+    # parse sys.argv
+    args = parser.parse_args()
+
+    # check args ranges
+    if args.jobs < 1:
+        util.die(__spec__.name, ValueError(
+            "jobs: NUM must be a positive integer"))
+    if args.cache_size < 1:
+        util.die(__spec__.name, ValueError(
+            "cache size: NUM must be a positive integer"))
+
+    try:
+        remove_stale_socket(args.socket)
+        server = Server(args.socket, args.jobs, args.cache_size)
+    except OSError as e:
+        util.die(__spec__.name, e)
+
+    # stop gracefully on termination too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class Summary:
+
+    def __init__(self, nodes: int, zeroes: int):
+        """
+        Epidemic curve of an evolution: how many nodes are susceptible,
+        infectious and recovered on each round.
+
+        Parameters:
+            * nodes (int): number of graph nodes
+            * zeroes (int): number of initially infectious nodes
+
+        Attributes:
+            * infections (int): number of infections, including the initial
+              ones; without immunity loss, this is the number of nodes ever
+              infected (i.e. the final outbreak size)
+        """
+        self.__counts = [(nodes - zeroes, zeroes, 0)]
+        self.infections = zeroes
+
+    @classmethod
+    def from_counts(cls, counts: np.ndarray, infections: int):
+        """
+        Build a summary from an array of counts, with shape (rounds, 3).
+        """
+        summary = cls(0, 0)
+        summary.__counts = [tuple(row) for row in counts.tolist()]
+        summary.infections = int(infections)
+        return summary
+
+    def append(self, infected: int, recovered: int, susceptible: int):
+        """
+        Append the next round, given how many nodes change state.
+
+        Parameters:
+            * infected (int): susceptible nodes becoming infectious
+            * recovered (int): infectious nodes becoming recovered
+            * susceptible (int): recovered nodes becoming susceptible
+        """
+        s, i, r = self.__counts[-1]
+        self.__counts.append((
+            s - infected + susceptible,
+            i + infected - recovered,
+            r + recovered - susceptible))
+        self.infections += infected
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        Susceptible, infectious and recovered nodes on each round, with
+        shape (rounds, 3).
+        """
+        return np.array(self.__counts, dtype=np.int64).reshape(-1, 3)
+
+    @property
+    def duration(self) -> int:
+        """Number of rounds, including the initial one."""
+        return len(self.__counts)
+
+    @property
+    def peak(self) -> int:
+        """Largest number of infectious nodes on a round."""
+        return max(i for _, i, _ in self.__counts)
+
+    @property
+    def peak_round(self) -> int:
+        """First round with the largest number of infectious nodes."""
+        infectious = [i for _, i, _ in self.__counts]
+        return infectious.index(max(infectious))
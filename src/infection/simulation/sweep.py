@@ -0,0 +1,258 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from .. import storage
+from ..csr import CSRGraph
+from .observer import Metrics
+
+
+# graph and parameters shared by all the tasks run by a process
+_context = {}
+
+
+def make_tasks(probabilities, count: int, seed: int = None,
+        batch: bool = False) -> list:
+    """
+    Split a parameter sweep into tasks; each task gets its own random seed,
+    so results do not depend on how tasks are scheduled.
+
+    Parameters:
+        * probabilities (Iterable): infection probabilities
+        * count (int): number of evolutions for each probability
+        * seed (int|None): sweep seed; if None, use fresh entropy
+        * batch (bool): whether all the evolutions of a probability are run
+          by a single task
+
+    Returns:
+        * list: tasks, as tuples (probability, replicas, seed)
+    """
+    params = [(float(prob), count) for prob in probabilities] if batch \
+        else [(float(prob), 1) for prob in probabilities
+              for _ in range(count)]
+    seeds = np.random.SeedSequence(seed).spawn(len(params))
+    return [(prob, replicas, int(ss.generate_state(1, np.uint64)[0]))
+            for (prob, replicas), ss in zip(params, seeds)]
+
+
+def run(graph, tasks: list, jobs: int = 1, start: int = 0, **params):
+    """
+    Run sweep tasks, either in this process or over a process pool.
+
+    Worker processes attach to a single shared memory copy of the compiled
+    graph, instead of each receiving their own copy.
+
+    Parameters:
+        * graph (networkx.Graph|CSRGraph): network to use for infection
+          spreading; it must be compiled if `jobs` is larger than one
+        * tasks (list): tasks from `make_tasks()`
+        * jobs (int): number of worker processes
+        * start (int): index of the first task, when a sweep is run a few
+          tasks at a time
+        * params (dict): evolution parameters:
+            - zeroes (set): initially infectious nodes
+            - random_zeroes (int|None): if not None, choose this many
+              initially infectious nodes randomly, ignoring `zeroes`
+            - infection_duration (int)
+            - recovery_duration (int|None)
+            - engine (Engine)
+            - batch (bool): run `BatchEvolution`, ignoring `engine`
+            - save (bool): save evolutions instead of returning them
+            - evolution_dir (str)
+            - fmt (storage.Format): evolution file format
+            - summary (bool): only count nodes in each state, ignoring
+              `save` and `fmt`
+            - metrics_dir (str|None): if not None, write the per-round
+              metrics of each evolution to a file in this directory, named
+              after the evolution UID if saved, else 'run-N.tsv' where N is
+              the task index; not supported by `batch`
+            - sweep_id (str|None): if not None, derive the UIDs of saved
+              evolutions from it and from the task seed, so that running a
+              task again replaces its evolutions (see `manifest.Manifest`)
+            - sizes (bool): also return the final size of each evolution,
+              i.e. its number of infections
+
+    Returns:
+        * Iterator: for each task, in task order, a list of evolution UIDs
+          (if `save`), summaries (if `summary`) or serialized evolutions;
+          with `sizes`, a tuple of that list and of the final sizes (list)
+    """
+    with runner(graph, jobs, **params) as run_tasks:
+        yield from run_tasks(tasks, start)
+
+
+@contextlib.contextmanager
+def runner(graph, jobs: int = 1, **params):
+    """
+    Start running sweep tasks, either in this process or over a process
+    pool, e.g. when tasks are scheduled a few at a time; the pool is kept
+    until the context is closed. See `run()` for the parameters.
+
+    Yields:
+        * function: run tasks, given a list of tasks and the index of the
+          first one, and return an Iterator over their outputs, as `run()`
+          does
+    """
+    if jobs <= 1:
+        _set_context(graph, params)
+        # streamed evolutions are written to standard output directly
+        _context['stdout'] = sys.stdout
+        yield lambda tasks, start=0: map(_run_task, enumerate(tasks, start))
+        return
+
+    descriptor, shm = graph.share()
+    try:
+        with multiprocessing.Pool(jobs, _init_worker,
+                (descriptor, params)) as pool:
+            yield lambda tasks, start=0: pool.imap(_run_task,
+                    enumerate(tasks, start))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def run_task(graph, task: tuple, index: int = 0, **params) -> list:
+    """
+    Run a single sweep task in this process, e.g. on behalf of a server
+    worker holding many graphs.
+
+    Parameters:
+        * graph (networkx.Graph|CSRGraph): network to use for infection
+          spreading
+        * task (tuple): task from `make_tasks()`
+        * index (int): task index, naming the metrics file of unsaved
+          evolutions
+        * params (dict): evolution parameters, see `run()`
+
+    Returns:
+        * list: evolution UIDs, summaries or serialized evolutions of the
+          task; with `sizes`, a tuple of that list and of the final sizes
+    """
+    _set_context(graph, params)
+    return _run_task((index, task))
+
+
+def _init_worker(descriptor: dict, params: dict):
+    graph, shm = CSRGraph.attach(descriptor)
+    if not (params['batch'] or params['engine'].value['compiled']):
+        graph = graph.to_networkx()
+    _set_context(graph, params)
+    # keep shared memory mapped as long as the worker lives
+    _context['shm'] = shm
+
+
+def _set_context(graph, params: dict):
+    _context.update(params)
+    _context['stdout'] = None
+    _context['graph'] = graph
+    _context['labels'] = graph.labels if isinstance(graph, CSRGraph) \
+        else list(graph)
+
+
+def _run_task(item: tuple) -> list:
+    index, task = item
+    metrics_dir = _context.get('metrics_dir')
+    observer = Metrics() if metrics_dir is not None else None
+    outputs, sizes = _evolve(task, observer)
+    if observer is not None:
+        saved = _context['save'] and not _context['summary']
+        name = outputs[0] if saved else 'run-%d' % index
+        observer.save(os.path.join(metrics_dir, name + '.tsv'))
+    if _context.get('sizes'):
+        return outputs, sizes
+    return outputs
+
+
+def _evolve(task: tuple, observer) -> tuple:
+    # return outputs and final sizes of the task evolutions
+    prob, replicas, seed = task
+    if _context['batch']:
+        # scipy is imported only for batch evolutions
+        from .batch import BatchEvolution
+    graph, labels = _context['graph'], _context['labels']
+    rng = np.random.default_rng(seed)
+
+    # choose zeroes
+    zeroes_list = []
+    for _ in range(replicas):
+        if _context['random_zeroes'] is not None:
+            chosen = rng.choice(len(labels), _context['random_zeroes'],
+                    replace=False)
+            zeroes_list.append({labels[k] for k in chosen.tolist()})
+        else:
+            zeroes_list.append(_context['zeroes'])
+    evo_seed = int(rng.integers(2**63))
+
+    args = (prob, _context['infection_duration'],
+            _context['recovery_duration'])
+    if _context['summary']:
+        # rounds are neither recorded nor serialized
+        if _context['batch']:
+            summaries = BatchEvolution(graph, zeroes_list, *args,
+                    record=False, seed=evo_seed).summaries
+        else:
+            summaries = [_context['engine'].value['class'](graph,
+                    zeroes_list[0], *args, seed=evo_seed, summary=True,
+                    observer=observer).summary]
+        return summaries, [summary.infections for summary in summaries]
+
+    save, fmt = _context['save'], _context['fmt']
+    keys = [_evolution_key(seed, replica) for replica in range(replicas)]
+    if fmt is storage.Format.NDJSON and not _context['batch']:
+        # write rounds while they are computed
+        evolution = _context['engine'].value['class'](
+                graph, zeroes_list[0], *args, seed=evo_seed, lazy=True,
+                observer=observer)
+        # infections are counted while rounds are written
+        sizes = [len(evolution.zeroes)]
+        stream_args = (graph.name, prob, evolution.zeroes,
+                _count_infections(evolution.transitions(), sizes))
+        if save:
+            return [storage.stream_evolution(*stream_args,
+                    _context['evolution_dir'], keys[0])], sizes
+        if _context['stdout']:
+            storage.write_ndjson(_context['stdout'], *stream_args)
+            return [], sizes
+        # workers can't share standard output
+        buf = io.StringIO()
+        storage.write_ndjson(buf, *stream_args)
+        return [buf.getvalue().rstrip('\n')], sizes
+
+    if _context['batch']:
+        batch = BatchEvolution(graph, zeroes_list, *args, seed=evo_seed)
+        rounds_list = batch.rounds
+        sizes = [summary.infections for summary in batch.summaries]
+    else:
+        evolution = _context['engine'].value['class'](
+                graph, zeroes_list[0], *args, seed=evo_seed,
+                observer=observer)
+        rounds_list = [evolution.rounds]
+        sizes = [len(evolution.rounds.keyframes[0]['i']) +
+                 sum(len(delta['i']) for delta in evolution.rounds.deltas)]
+
+    if save:
+        return [storage.save_evolution(graph.name, prob, rounds,
+                    _context['evolution_dir'], fmt, labels, key)
+                for rounds, key in zip(rounds_list, keys)], sizes
+    return [storage.dumps_evolution(graph.name, prob, rounds, fmt)
+            for rounds in rounds_list], sizes
+
+
+def _evolution_key(seed: int, replica: int):
+    # evolutions of a sweep are named after their task, if the sweep is
+    # identified
+    sweep_id = _context.get('sweep_id')
+    if sweep_id is None:
+        return None
+    return '%s-%d-%d' % (sweep_id, seed, replica)
+
+
+def _count_infections(transitions, sizes: list):
+    # add newly infectious nodes of each round to the last size
+    for delta in transitions:
+        sizes[-1] += len(delta[0])
+        yield delta
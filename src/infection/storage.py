@@ -0,0 +1,743 @@
+import collections.abc
+import enum
+import errno
+import hashlib
+import io
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import uuid
+
+import numpy as np
+
+from .index import CONTAINER_EXT, UIDIndex, index_file, indexed_path
+from .index import scan_records, walk_files
+from .node import State
+from .rounds import Rounds, from_evolution
+
+
+_S = State.SUSCEPTIBLE.value['code']
+_I = State.INFECTIOUS.value['code']
+_R = State.RECOVERED.value['code']
+
+# adjacency list lines written at once
+_GRAPH_CHUNK = 4096
+
+# version of the JSON evolution schema (keyframes and deltas); JSON
+# evolutions without version list the full state of every round
+JSON_VERSION = 2
+
+# binary container: magic string, header length, JSON header, then arrays
+_MAGIC = b'INFECTN1'
+_PREFIX = struct.Struct('<8sQ')
+_ALIGN = 64
+
+
+def write_arrays(path: str, meta: dict, arrays: dict):
+    """
+    Write a binary container of named arrays plus JSON metadata; arrays are
+    aligned so that they can be memory-mapped back, see `map_arrays()`.
+
+    Parameters:
+        * path (str): file to write
+        * meta (dict): JSON-serializable metadata
+        * arrays (dict): numpy arrays, by name
+
+    Raises:
+        * OSError: if the file can't be written
+    """
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset
+        }
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({'meta': meta, 'arrays': layout}).encode()
+    data_start = -(-(_PREFIX.size + len(header)) // _ALIGN) * _ALIGN
+
+    with open(path, 'wb') as f:
+        f.write(_PREFIX.pack(_MAGIC, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+
+
+def map_arrays(path: str):
+    """
+    Memory-map a binary container written by `write_arrays()`; array data
+    is read from disk only when accessed.
+
+    Parameters:
+        * path (str): file to map
+
+    Returns:
+        * tuple: metadata (dict) and read-only arrays (dict)
+
+    Raises:
+        * OSError: if the file can't be read
+        * ValueError: if the file is not a binary container
+    """
+    with open(path, 'rb') as f:
+        magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != _MAGIC:
+            raise ValueError("Not a binary container: '%s'" % path)
+        header = json.loads(f.read(header_len))
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    data_start = -(-(_PREFIX.size + header_len) // _ALIGN) * _ALIGN
+
+    arrays = {}
+    for name, info in header['arrays'].items():
+        dtype = np.dtype(info['dtype'])
+        count = int(np.prod(info['shape']))
+        arrays[name] = np.frombuffer(buf, dtype, count,
+                data_start + info['offset']).reshape(info['shape'])
+    return header['meta'], arrays
+
+
+class BinaryRounds(collections.abc.Sequence):
+
+    def __init__(self, meta: dict, arrays: dict):
+        """
+        Evolution rounds decoded on demand from a binary evolution file.
+
+        Parameters:
+            * meta (dict): evolution metadata
+            * arrays (dict): evolution arrays:
+                - 'keyframes': node states of rounds 0, K, 2K, ...
+                - 'delta-ptr': bounds of the transitions of each round, in
+                  `delta-nodes`
+                - 'delta-nodes': indices of the nodes changing state
+
+        Attributes:
+            * labels (list): node labels, sorted by node index
+            * keyframe_interval (int): rounds between two keyframes
+        """
+        self.labels = meta['labels']
+        self.keyframe_interval = meta['keyframe-interval']
+        self.__keyframes = arrays['keyframes']
+        self.__delta_ptr = arrays['delta-ptr']
+        self.__delta_nodes = arrays['delta-nodes']
+
+    def __len__(self):
+        return (len(self.__delta_ptr) - 1) // 3 + 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[k] for k in range(*index.indices(len(self)))]
+        return self._to_dict(self.state_array(index))
+
+    def iterate(self, first: int = 0, last: int = None):
+        """
+        Iterate over rounds from `first` (included) to `last` (excluded),
+        seeking to the first round and then replaying each transition once.
+        """
+        first, last, _ = slice(first, last).indices(len(self))
+        if first >= last:
+            return
+        state = self.state_array(first).copy()
+        yield self._to_dict(state)
+        for k in range(first + 1, last):
+            self._apply(state, k)
+            yield self._to_dict(state)
+
+    def state_array(self, index: int) -> np.ndarray:
+        """
+        Return the state code of each node at a given round, by node index.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('round index out of range')
+
+        # start from the closest keyframe, then replay transitions
+        base = index // self.keyframe_interval
+        state = self.__keyframes[base].copy()
+        for k in range(base * self.keyframe_interval + 1, index + 1):
+            self._apply(state, k)
+        return state
+
+    def _apply(self, state: np.ndarray, index: int):
+        ptr, nodes = self.__delta_ptr, self.__delta_nodes
+        # transitions leading to round `index`
+        j = 3 * (index - 1)
+        state[nodes[ptr[j]:ptr[j+1]]] = _I
+        state[nodes[ptr[j+1]:ptr[j+2]]] = _R
+        state[nodes[ptr[j+2]:ptr[j+3]]] = _S
+
+    def _to_dict(self, state: np.ndarray) -> dict:
+        labels = self.labels
+        return {
+            'i': [labels[k] for k in np.flatnonzero(state == _I).tolist()],
+            'r': [labels[k] for k in np.flatnonzero(state == _R).tolist()]
+        }
+
+
+def _dump_binary(path: str, graph_uid: str, probability: float, rounds,
+        labels: list):
+    index = {label: k for k, label in enumerate(labels)}
+
+    keyframes = np.full((len(rounds.keyframes), len(labels)), _S,
+            dtype=np.uint8)
+    for row, keyframe in zip(keyframes, rounds.keyframes):
+        row[[index[label] for label in keyframe['i']]] = _I
+        row[[index[label] for label in keyframe['r']]] = _R
+
+    # transitions of each round, in order: infected, recovered, susceptible
+    groups = [delta[key] for delta in rounds.deltas for key in 'irs']
+    delta_ptr = np.zeros(len(groups) + 1, dtype=np.int64)
+    delta_ptr[1:] = np.cumsum([len(group) for group in groups])
+    delta_nodes = np.fromiter(
+            (index[label] for group in groups for label in group),
+            dtype=np.int32, count=int(delta_ptr[-1]))
+
+    meta = {
+        'graph-uid': graph_uid,
+        'probability': probability,
+        'keyframe-interval': rounds.keyframe_interval,
+        'labels': labels
+    }
+    write_arrays(path, meta, {
+        'keyframes': keyframes,
+        'delta-ptr': delta_ptr,
+        'delta-nodes': delta_nodes
+    })
+
+
+def _dump_json(path: str, graph_uid: str, probability: float, rounds,
+        labels: list):
+    with open(path, 'w') as f:
+        f.write(dumps_evolution(graph_uid, probability, rounds))
+
+
+def _dump_rounds(path: str, graph_uid: str, probability: float, rounds,
+        labels: list):
+    with open(path, 'w') as f:
+        f.write(dumps_evolution(graph_uid, probability, rounds, Format.ROUNDS))
+
+
+def _dump_ndjson(path: str, graph_uid: str, probability: float, rounds,
+        labels: list):
+    with open(path, 'w') as f:
+        _write_rounds_ndjson(f, graph_uid, probability, rounds)
+
+
+def _write_rounds_ndjson(f, graph_uid: str, probability: float, rounds):
+    write_ndjson(f, graph_uid, probability, rounds.keyframes[0]['i'],
+            ((delta['i'], delta['r'], delta['s'])
+             for delta in rounds.deltas))
+
+
+def _parse_ndjson(lines):
+    lines = iter(lines)
+    try:
+        evo = json.loads(next(lines))
+    except StopIteration:
+        raise ValueError('Empty evolution')
+    rounds = Rounds(evo['zeroes'])
+    for line in lines:
+        if line.strip():
+            delta = json.loads(line)
+            rounds.append(delta['i'], delta['r'], delta['s'])
+    return evo, rounds
+
+
+def _load_binary(path: str):
+    meta, arrays = map_arrays(path)
+    return meta, BinaryRounds(meta, arrays)
+
+
+def _load_json(path: str):
+    with open(path) as f:
+        evo = json.load(f)
+    return evo, from_evolution(evo)
+
+
+def _load_ndjson(path: str):
+    with open(path) as f:
+        return _parse_ndjson(f)
+
+
+class Format(enum.Enum):
+
+    JSON = {
+        'help': "JSON document; human-readable.",
+        'ext': '.json',
+        'dump': _dump_json,
+        'load': _load_json
+    }
+
+    ROUNDS = {
+        'help': "JSON document listing the full state of every round, as " \
+                "written by earlier versions; larger than JSON.",
+        'ext': '.json',
+        'dump': _dump_rounds,
+        'load': _load_json
+    }
+
+    NDJSON = {
+        'help': "Newline-delimited JSON, one line per round; written while " \
+                "rounds are computed, without keeping them in memory.",
+        'ext': '.ndjson',
+        'dump': _dump_ndjson,
+        'load': _load_ndjson
+    }
+
+    BINARY = {
+        'help': "Binary container, memory-mapped and decoded on demand " \
+                "when read; suitable for large graphs.",
+        'ext': '.evo',
+        'dump': _dump_binary,
+        'load': _load_binary
+    }
+
+
+def dumps_evolution(graph_uid: str, probability: float, rounds,
+        fmt: Format = Format.JSON) -> str:
+    """
+    Serialize an evolution to text.
+
+    JSON documents hold keyframes and deltas, see `Rounds.to_dict()`, and
+    the schema version (`JSON_VERSION`) in field 'format-version'; ROUNDS
+    documents hold the full state of every round in field 'rounds', as
+    evolutions written by earlier versions, without version.
+
+    Parameters:
+        * graph_uid (str): UID of the graph the evolution spreads over
+        * probability (float): infection probability
+        * rounds (Rounds): evolution rounds
+        * fmt (Format): either JSON, ROUNDS or NDJSON
+
+    Returns:
+        * str: JSON document, or NDJSON lines without the last line break
+    """
+    if fmt is Format.NDJSON:
+        buf = io.StringIO()
+        _write_rounds_ndjson(buf, graph_uid, probability, rounds)
+        return buf.getvalue().rstrip('\n')
+
+    evo_data = {}
+    evo_data['graph-uid'] = graph_uid
+    evo_data['probability'] = probability
+    if fmt is Format.ROUNDS:
+        evo_data['rounds'] = [*rounds]
+    else:
+        evo_data['format-version'] = JSON_VERSION
+        evo_data.update(rounds.to_dict())
+    return json.dumps(evo_data)
+
+
+def write_ndjson(f, graph_uid: str, probability: float, zeroes,
+        transitions):
+    """
+    Write an evolution as newline-delimited JSON: a header line, then one
+    line per round, written as soon as the round is available.
+
+    Parameters:
+        * f (file): text file to write to
+        * graph_uid (str): UID of the graph the evolution spreads over
+        * probability (float): infection probability
+        * zeroes (Iterable): initially infectious nodes
+        * transitions (Iterable): nodes becoming infectious, recovered and
+          susceptible on each round after the initial one, like
+          `Evolution.transitions()`
+    """
+    evo_data = {}
+    evo_data['graph-uid'] = graph_uid
+    evo_data['probability'] = probability
+    evo_data['zeroes'] = [*zeroes]
+    f.write(json.dumps(evo_data) + '\n')
+    for infected, recovered, susceptible in transitions:
+        f.write(json.dumps({
+            'i': infected,
+            'r': recovered,
+            's': susceptible
+        }) + '\n')
+
+
+def _new_uid(graph_uid: str, key: str = None) -> str:
+    # evolution UID consists of:
+    # - a fixed graph UID prefix
+    # - a random and (hopefully) unique string, or the hash of a key
+    if key is not None:
+        return "%s-%s" % (graph_uid[:8],
+                hashlib.sha1(key.encode()).hexdigest()[:32])
+    return "%s-%s" % (graph_uid[:8], uuid.uuid4().hex)
+
+
+def save_evolution(graph_uid: str, probability: float, rounds,
+        evolution_dir: str, fmt: Format = Format.JSON,
+        labels: list = None, key: str = None) -> str:
+    """
+    Save an evolution to a new file in the evolution directory.
+
+    Parameters:
+        * graph_uid (str): UID of the graph the evolution spreads over
+        * probability (float): infection probability
+        * rounds (Rounds): evolution rounds
+        * evolution_dir (str): directory to save the evolution file in
+        * fmt (Format): evolution file format
+        * labels (list|None): graph node labels; required by the binary
+          format only
+        * key (str|None): if not None, derive the evolution UID from key
+          instead of choosing it randomly, so that saving again with the same
+          key replaces the same file
+
+    Returns:
+        * str: evolution UID
+
+    Raises:
+        * OSError: if the evolution file can't be written
+    """
+    evo_uid = _new_uid(graph_uid, key)
+    evo_name = evo_uid + fmt.value['ext']
+    evo_path = indexed_path(evolution_dir, evo_name)
+
+    fmt.value['dump'](evo_path, graph_uid, probability, rounds, labels)
+    index_file(evolution_dir, evo_name)
+
+    return evo_uid
+
+
+def stream_evolution(graph_uid: str, probability: float, zeroes,
+        transitions, evolution_dir: str, key: str = None) -> str:
+    """
+    Save an evolution while it is computed, to a new newline-delimited JSON
+    file in the evolution directory; see `write_ndjson()`.
+
+    Parameters:
+        * graph_uid (str): UID of the graph the evolution spreads over
+        * probability (float): infection probability
+        * zeroes (Iterable): initially infectious nodes
+        * transitions (Iterable): nodes changing state on each round
+        * evolution_dir (str): directory to save the evolution file in
+        * key (str|None): if not None, derive the evolution UID from key, see
+          `save_evolution()`
+
+    Returns:
+        * str: evolution UID
+
+    Raises:
+        * OSError: if the evolution file can't be written
+    """
+    evo_uid = _new_uid(graph_uid, key)
+    evo_name = evo_uid + Format.NDJSON.value['ext']
+    evo_path = indexed_path(evolution_dir, evo_name)
+
+    with open(evo_path, 'w') as f:
+        write_ndjson(f, graph_uid, probability, zeroes, transitions)
+    index_file(evolution_dir, evo_name)
+
+    return evo_uid
+
+
+def write_graph(f, lines, hasher=None):
+    """
+    Write adjacency list lines to a text file, one at a time; the text is the
+    same as `'\\n'.join(lines) + '\\n'`, without building it in memory.
+
+    Parameters:
+        * f (file): text file to write to
+        * lines (Iterable): adjacency list lines, as generated by
+          `networkx.generate_adjlist()`
+        * hasher (hashlib object|None): if not None, the hash is updated with
+          the UTF-8 encoded text
+    """
+    empty = True
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == _GRAPH_CHUNK:
+            _write_graph_chunk(f, chunk, hasher)
+            chunk, empty = [], False
+    if chunk or empty:
+        # an empty graph is still a newline
+        _write_graph_chunk(f, chunk, hasher)
+
+
+def _write_graph_chunk(f, chunk: list, hasher):
+    txt = '\n'.join(chunk) + '\n'
+    f.write(txt)
+    if hasher is not None:
+        hasher.update(txt.encode())
+
+
+def save_graph(lines, graph_dir: str) -> str:
+    """
+    Save an adjacency list to a new file in the graph directory; the file
+    name is the graph UID, i.e. the SHA-1 hash of the file contents.
+
+    Lines are written to a temporary file while the hash is computed, then
+    the file is renamed atomically: a graph file is either complete or
+    missing.
+
+    Parameters:
+        * lines (Iterable): adjacency list lines, see `write_graph()`
+        * graph_dir (str): directory to save the graph file in
+
+    Returns:
+        * str: graph UID
+
+    Raises:
+        * OSError: if the graph file can't be written
+    """
+    hasher = hashlib.sha1()
+    # a hidden name can't match a UID prefix
+    fd, tmp_path = tempfile.mkstemp('.tmp', '.graph-', graph_dir, text=True)
+    try:
+        with open(fd, 'w', encoding='utf-8', newline='\n') as f:
+            write_graph(f, lines, hasher)
+        graph_uid = hasher.hexdigest()
+        # temporary files are private, graph files are not
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path,
+                indexed_path(graph_dir, graph_uid + '.adjlist'))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    index_file(graph_dir, graph_uid + '.adjlist')
+    return graph_uid
+
+
+class EvolutionLog:
+
+    def __init__(self, graph_uid: str, evolution_dir: str,
+            flush_every: int = 100):
+        """
+        Append-only container file holding many JSON evolutions, e.g. all the
+        evolutions of a sweep, instead of one file each.
+
+        Each evolution is a line '{"uid": UID, "evolution": EVOLUTION}', so
+        it keeps its own UID; records are added to the evolution directory
+        index on flush, with their offset in the container, see
+        `find_evolution()`. Records are buffered and written in batches.
+
+        Parameters:
+            * graph_uid (str): UID of the graph the evolutions spread over
+            * evolution_dir (str): directory to save the container in
+            * flush_every (int): number of records buffered before writing
+              them; 1 writes each record at once
+
+        Attributes:
+            * uid (str): container UID
+
+        Raises:
+            * OSError: if the container can't be created
+        """
+        self.uid = _new_uid(graph_uid)
+        self.__graph_uid = graph_uid
+        self.__evolution_dir = evolution_dir
+        self.__flush_every = max(flush_every, 1)
+        self.__path = indexed_path(evolution_dir, self.uid + CONTAINER_EXT)
+        self.__file = open(self.__path, 'ab')
+        self.__buffer = []
+
+    def append(self, evolution: str) -> str:
+        """
+        Append an evolution to the container.
+
+        Parameters:
+            * evolution (str): JSON evolution, see `dumps_evolution()`
+
+        Returns:
+            * str: evolution UID
+
+        Raises:
+            * OSError: if the buffered records can't be written
+        """
+        evo_uid = _new_uid(self.__graph_uid)
+        self.__buffer.append((evo_uid, ('{"uid": %s, "evolution": %s}\n' %
+                (json.dumps(evo_uid), evolution)).encode()))
+        if len(self.__buffer) >= self.__flush_every:
+            self.flush()
+        return evo_uid
+
+    def flush(self):
+        """
+        Write buffered records, then add them to the evolution directory
+        index; indexing is best effort, as in `save_evolution()`.
+
+        Raises:
+            * OSError: if the buffered records can't be written
+        """
+        if not self.__buffer:
+            return
+        offset = self.__file.tell()
+        records = []
+        for uid, line in self.__buffer:
+            records.append((uid, offset, len(line)))
+            offset += len(line)
+        self.__file.write(b''.join(line for _, line in self.__buffer))
+        self.__file.flush()
+        self.__buffer = []
+        try:
+            with UIDIndex(self.__evolution_dir) as index:
+                index.add_records(self.__path, records)
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+        """Write buffered records and close the container."""
+        try:
+            self.flush()
+        finally:
+            self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def find_evolution(evolution_dir: str, prefix: str):
+    """
+    Load the evolution whose UID starts with prefix, either from its own
+    file or from a container, see `EvolutionLog`.
+
+    Parameters:
+        * evolution_dir (str): evolution directory
+        * prefix (str): evolution UID prefix
+
+    Returns:
+        * tuple: evolution fields (dict) and rounds (Sequence)
+
+    Raises:
+        * FileNotFoundError: if no evolution or too many evolutions are
+        matching prefix
+        * OSError: if the evolution file can't be read
+        * ValueError: if the evolution can't be decoded
+        * KeyError: if no rounds are found
+    """
+    try:
+        with UIDIndex(evolution_dir, create=False) as index:
+            path, offset, length = index.locate(prefix)
+    except sqlite3.Error:
+        # no usable index: look for files and container records
+        path, offset, length = _scan_evolution_dir(evolution_dir, prefix)
+
+    if offset is None:
+        return load_evolution(path)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        evo = json.loads(f.read(length))['evolution']
+    return evo, from_evolution(evo)
+
+
+def _scan_evolution_dir(evolution_dir: str, prefix: str) -> tuple:
+    candidates = []
+    for name in os.listdir(evolution_dir):
+        path = os.path.join(evolution_dir, name)
+        if name.endswith(CONTAINER_EXT):
+            candidates += [(path, offset, length) for uid, offset, length
+                           in scan_records(path) if uid.startswith(prefix)]
+        elif name.startswith(prefix) and os.path.isfile(path):
+            candidates.append((path, None, None))
+    # same errors as `util.uid_to_path()`
+    if not candidates:
+        raise FileNotFoundError(errno.ENOENT,
+                "No matching file in '%s' for UID '%s'." %
+                (evolution_dir, prefix))
+    if len(candidates) > 1:
+        raise FileNotFoundError(errno.ENOKEY,
+                "Too many matching files in '%s' for UID '%s'." %
+                (evolution_dir, prefix))
+    return candidates[0]
+
+
+def iter_evolutions(evolution_dir: str, prefix: str = ''):
+    """
+    Generate the evolutions whose UID starts with prefix, from their own
+    files and from containers, loading one evolution at a time; files are
+    visited in name order.
+
+    Parameters:
+        * evolution_dir (str): evolution directory
+        * prefix (str): evolution UID prefix; if empty, generate all the
+          evolutions in the directory
+
+    Yields:
+        * tuple: evolution UID (str), fields (dict) and rounds (Sequence)
+
+    Raises:
+        * OSError: if the directory or an evolution file can't be read
+        * ValueError: if an evolution can't be decoded
+        * KeyError: if no rounds are found
+    """
+    paths = sorted(walk_files(evolution_dir), key=os.path.basename)
+    for path in paths:
+        name = os.path.basename(path)
+        path = os.path.join(evolution_dir, path)
+        if name.endswith(CONTAINER_EXT):
+            records = [record for record in scan_records(path)
+                       if record[0].startswith(prefix)]
+            if not records:
+                continue
+            with open(path, 'rb') as f:
+                for uid, offset, length in records:
+                    f.seek(offset)
+                    evo = json.loads(f.read(length))['evolution']
+                    yield uid, evo, from_evolution(evo)
+        elif name.startswith(prefix):
+            evo, rounds = load_evolution(path)
+            yield os.path.splitext(name)[0], evo, rounds
+
+
+def load_evolution(path: str):
+    """
+    Load an evolution file, choosing the reader from the file extension;
+    unknown extensions are read as JSON.
+
+    Parameters:
+        * path (str): evolution file path
+
+    Returns:
+        * tuple: evolution fields (dict) and rounds (Sequence)
+
+    Raises:
+        * OSError: if the evolution file can't be read
+        * ValueError: if the evolution file can't be decoded
+        * KeyError: if no rounds are found
+    """
+    ext = os.path.splitext(path)[1]
+    for fmt in Format:
+        if fmt.value['ext'] == ext:
+            return fmt.value['load'](path)
+    return Format.JSON.value['load'](path)
+
+
+def read_evolution(f):
+    """
+    Read an evolution from an open text file, either JSON or
+    newline-delimited JSON.
+
+    Parameters:
+        * f (file): text file to read from
+
+    Returns:
+        * tuple: evolution fields (dict) and rounds (Sequence)
+
+    Raises:
+        * ValueError: if the evolution can't be decoded
+        * KeyError: if no rounds are found
+    """
+    txt = f.read()
+    try:
+        evo = json.loads(txt)
+    except json.JSONDecodeError:
+        return _parse_ndjson(txt.splitlines())
+    # an NDJSON evolution without rounds is a single line, i.e. its header:
+    # unlike JSON evolutions, it has initially infectious nodes, but neither
+    # rounds nor keyframes
+    if isinstance(evo, dict) and 'zeroes' in evo \
+            and 'rounds' not in evo and 'keyframes' not in evo:
+        return _parse_ndjson(txt.splitlines())
+    return evo, from_evolution(evo)
@@ -1,9 +1,12 @@
 import errno
 import os
+import sqlite3
 import sys
 
 import numpy as np
 
+from .index import UIDIndex
+
 
 def make_dir_check_writable(path: str):
     """
@@ -110,6 +113,33 @@ def string_to_linspace(string: str):
     return np.round(np.linspace(start, stop, num), 8)
 
 
+def string_to_range(string: str):
+    """
+    Parse string to generate a pair of integer bounds.
+    The string format is: FIRST[,LAST]
+
+    Parameters:
+        * string (str): comma-separated representation of:
+            - first (int): first value (included)
+            - last (int, optional): last value (excluded); default is None
+
+    Returns:
+        * tuple: pair of bounds, the second one may be None
+
+    Raises:
+        * TypeError: if string cannot be split into 1 or 2 parts
+        * ValueError: if any part of the string cannot be converted to
+        integer
+    """
+    params = string.split(',')
+    if not len(params) in (1, 2):
+        msg = 'expected 1 or 2 comma-separated values, got %s' % len(params)
+        raise TypeError(msg)
+    first = int(params[0])
+    last = int(params[1]) if len(params) == 2 else None
+    return first, last
+
+
 def die(package: str, exception: Exception):
     """
     Gracefully print exception error and die.
@@ -128,6 +158,9 @@ def uid_to_path(directory: str, prefix: str) -> str:
     Return path of file in directory whose name starts with prefix.
     Raises error if zero or more than one file is found.
 
+    Files are looked up in the directory index, see `index.UIDIndex`; if
+    there is no index, or it can't be used, the directory is listed instead.
+
     Parameters:
         * directory (str): directory to search a matching file in
         * prefix (str): UID prefix to search for a matching file
@@ -140,6 +173,12 @@ def uid_to_path(directory: str, prefix: str) -> str:
         * FileNotFoundError: if no file or too many files in directory are
         matching prefix
     """
+    try:
+        with UIDIndex(directory, create=False) as index:
+            return index.lookup(prefix)
+    except sqlite3.Error:
+        pass
+
     candidates = [f for f in os.listdir(directory) if f.startswith(prefix)
                   and os.path.isfile(os.path.join(directory, f))]
     if not candidates:
@@ -1,3 +1,14 @@
-from .animation import Animation2D
-from .layout import Layout
-from .timeline import Timeline
+from .._lazy import attach
+
+
+# public names, by module; modules are imported on first use, e.g.
+# matplotlib only when plotting
+__getattr__, __dir__, __all__ = attach(__name__, {
+    'Aggregate': 'aggregate',
+    'Plot': 'aggregate',
+    'Animation2D': 'animation',
+    'Layout': 'layout',
+    'compute_layout': 'layout',
+    'Binning': 'timeline',
+    'Timeline': 'timeline',
+})
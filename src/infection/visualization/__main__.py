@@ -5,20 +5,111 @@ Visualize epidemic spreading in a SI[R][S]-model based network.
 """
 
 import argparse
-import json
+import errno
+import os
+import shutil
 
 import networkx as nx
 
-from . import *
+from .aggregate import Aggregate, Plot
+from .layout import Layout
+from .timeline import Binning, Timeline
+from .. import storage
 from .. import util
+from ..csr import CSRGraph, load_graph
+
+
+def load_graph_for(args, evo: dict):
+    """
+    Load the graph given on the command line, or else the graph the
+    evolution spreads over; exit on errors.
+
+    Returns:
+        * tuple: graph (CSRGraph) and graph file path (str|None)
+    """
+    # scan graph description sources in decreasing priority
+    graph_path, graph_descr = None, None
+    # - graph file handled by argparse
+    if args.graph_file:
+        graph_descr = args.graph_file
+    # - graph by uid on command line
+    elif args.graph_uid:
+        try:
+            graph_path = util.uid_to_path(args.graph_dir, args.graph_uid)
+        except OSError as e:
+            util.die(__package__, e)
+    # - graph by uid in evolution file
+    elif 'graph-uid' in evo:
+        try:
+            graph_path = util.uid_to_path(args.graph_dir, evo['graph-uid'])
+        except OSError as e:
+            util.die(__package__, e)
+    # - legacy options
+    elif 'graph-filename' in evo:
+        with open(evo['graph-filename']) as f:
+            graph_descr = f.readlines()
+    elif 'graph-adjlist' in evo:
+        graph_descr = evo['graph-adjlist']
+    else:
+        util.die(__package__, FileNotFoundError(
+            'Graph description not found (use -g or -G)'))
+
+    # generate graph
+    if graph_path:
+        try:
+            # compiled graph is cached in the graph directory
+            graph = load_graph(graph_path, args.edges)
+        except OSError as e:
+            util.die(__package__, e)
+    elif args.edges:
+        graph = CSRGraph.from_networkx(nx.parse_edgelist(graph_descr))
+    else:
+        graph = CSRGraph.from_networkx(nx.parse_adjlist(graph_descr))
+
+    # numeric conversion
+    if args.numeric != 'never':
+        subs = util.map_to_int(graph.labels, args.numeric == 'always')
+        graph = graph.relabel(subs)
+
+    return graph, graph_path
+
+
+def aggregate(args):
+    """Stream evolutions into aggregated plots; exit on errors."""
+    plots = None if args.plot is None else [Plot[p] for p in args.plot]
+    evolutions = storage.iter_evolutions(args.evolution_dir, args.aggregate)
+    try:
+        first = next(evolutions, None)
+        if first is None:
+            raise FileNotFoundError(errno.ENOENT,
+                    "No matching evolution in '%s' for UID '%s'." %
+                    (args.evolution_dir, args.aggregate))
+        # the heatmap needs the node labels, from the graph of the first
+        # evolution; by default, it is left out if there is no graph
+        labels = None
+        if (Plot.HEATMAP in plots) if plots else (args.graph_file or
+                args.graph_uid or 'graph-uid' in first[1]):
+            labels = load_graph_for(args, first[1])[0].labels
+        stats = Aggregate(labels)
+        stats.add(*first[1:])
+        for _, evo, rounds in evolutions:
+            stats.add(evo, rounds)
+        fig = stats.plot(plots, show=not args.output)
+        if args.output:
+            fig.savefig(args.output)
+    except (OSError, ValueError) as e:
+        util.die(__package__, e)
+    except KeyError as e:
+        util.die(__package__, KeyError('Rounds field not found: %s' % e))
 
 
 def main():
     parser = argparse.ArgumentParser(prog=__package__, description=__doc__)
     # plot animation (default: false)
     parser.add_argument('-a', '--animate',
-            help="""Animate the contagion; this is very CPU-intensive and not
-            suitable for large graphs.""", action='store_true')
+            help="""Animate the contagion; only node colors are redrawn on
+            each round, still this is not suitable for very large graphs.""",
+            action='store_true')
     # flag to read graph file as edge list (default: false)
     parser.add_argument('--edges',
             help="""Treat graph file as edge list. This option allows to ignore
@@ -41,8 +132,15 @@ def main():
     # - from file
     evo_g.add_argument('-E', '--evolution-file', metavar='FILE',
             help="""Read evolution from FILE (absolute or relative path).
-            If FILE is -, read standard input.""",
+            If FILE is -, read standard input, either JSON or NDJSON.""",
             type=argparse.FileType(), default=None)
+    # - many evolutions, by UID prefix
+    evo_g.add_argument('-A', '--aggregate', metavar='PREFIX',
+            help="""Plot statistics of all the evolutions whose UID starts
+            with PREFIX, from the evolution directory, also in containers;
+            if PREFIX is empty (''), use all the evolutions in the directory.
+            Evolutions are read one at a time. See also option '--plot'.""",
+            type=str)
     # directory graphs are saved in
     parser.add_argument('--graph-dir', metavar='PATH',
             help="""Graph directory path; this is created when needed.
@@ -69,8 +167,12 @@ def main():
     parser.add_argument('-l', '--layout', metavar='LAYOUT',
             help="""Position nodes using LAYOUT layout. Available layouts are:
             """ + str([*Layout.__members__])[1:-1] + """. If LAYOUT is missing,
-            default is 'SPRING'. Without '-a/--animation', this option has no
-            effect.""", type=str, choices=Layout.__members__, default='SPRING')
+            default is 'SPRING'. 'FORCE' is a fast approximate force-directed
+            layout, for large graphs; 'CYCLE' and 'TORUS' place nodes as in
+            CYCLE and TORUS graphs. Positions of saved graphs are cached, so
+            that they are computed once. Without '-a/--animation', this option
+            has no effect.""", type=str, choices=Layout.__members__,
+            default='SPRING')
     # try to save nodes as integers
     parser.add_argument('-n', '--numeric', metavar='WHEN',
             help="""Specify when to treat node labels as numbers. If WHEN is
@@ -80,73 +182,106 @@ def main():
             can be treated as numbers, otherwise all labels will be treated as
             strings, in a "all-or-none" policy.""", choices=['always', 'never'],
             default='auto')
+    # rounds to show
+    parser.add_argument('-r', '--rounds', metavar='FIRST[,LAST]',
+            help="""Show rounds from FIRST (included) to LAST (excluded) only.
+            Negative values count from the end of the evolution. If LAST is
+            missing, show rounds up to the end of the evolution.""",
+            type=util.string_to_range, default=(0, None))
     # print timeline (default: false)
     parser.add_argument('-t', '--timeline',
             help="""Print node states at each round on the standard output; this
             option requires a color-capable terminal.""", action='store_true')
+    # fit timeline into terminal width
+    parser.add_argument('-w', '--width', metavar='COLUMNS',
+            help="""With '--timeline', fit lines into COLUMNS characters,
+            binning consecutive nodes into one character each when needed; if
+            COLUMNS is 0, use the terminal width. By default, show one
+            character per node.""", type=int, default=None)
+    # how to show a bin of nodes
+    parser.add_argument('--binning', metavar='MODE',
+            help="""With '--width', choose the state shown for a bin of
+            nodes using MODE mode. Available modes are: """ +
+            str([*Binning.__members__])[1:-1] + """. If MODE is missing,
+            default is 'PRIORITY'.""", type=str,
+            choices=Binning.__members__, default='PRIORITY')
+    # aggregated plots to draw
+    parser.add_argument('-p', '--plot', metavar='KIND',
+            help="""With '--aggregate', draw KIND plot; repeat this option to
+            draw more plots. Available plots are: """ +
+            str([*Plot.__members__])[1:-1] + """. By default, draw all of
+            them; 'HEATMAP' requires the graph, either from the evolutions or
+            from '-g/-G'.""", type=str, choices=Plot.__members__,
+            action='append', default=None)
+    # encode animation instead of showing it
+    parser.add_argument('-o', '--output', metavar='FILE',
+            help="""With '--animate', encode the animation to FILE instead
+            of showing it; no display is needed. GIF files are written with
+            Pillow, other formats (e.g. MP4) with ffmpeg. With
+            '--aggregate', save the plots to FILE (e.g. PNG, SVG or PDF,
+            from the extension).""", type=str,
+            default=None)
+    # animation speed
+    parser.add_argument('--fps', metavar='NUM',
+            help="""With '--output', play NUM rounds per second. By
+            default, NUM is 5.""", type=int, default=5)
     # parse sys.argv
     args = parser.parse_args()
 
-    # read evolution file
-    if args.evolution_uid:
-        try:
-            evo_path = util.uid_to_path(args.evolution_dir, args.evolution_uid)
-            with open(evo_path) as f:
-                evo = json.load(f)
-        except OSError as e:
-            util.die(__package__, e)
-    else:
-        try:
-            evo = json.load(args.evolution_file)
-        except json.JSONDecodeError as e:
-            util.die(__package__, e)
+    # check args ranges
+    if args.fps < 1:
+        util.die(__package__, ValueError(
+            "fps: NUM must be a positive integer"))
 
-    # scan graph description sources in decreasing priority
-    # - graph file handled by argparse
-    if args.graph_file:
-        graph_descr = args.graph_file
-    # - graph by uid on command line
-    elif args.graph_uid:
-        try:
-            graph_path = util.uid_to_path(args.graph_dir, args.graph_uid)
-            with open(graph_path) as f:
-                graph_descr = f.readlines()
-        except OSError as e:
-            util.die(__package__, e)
-    # - graph by uid in evolution file
-    elif 'graph-uid' in evo:
-        try:
-            graph_path = util.uid_to_path(args.graph_dir, evo['graph-uid'])
-            with open(graph_path) as f:
-                graph_descr = f.readlines()
-        except OSError as e:
-            util.die(__package__, e)
-    # - legacy options
-    elif 'graph-filename' in evo:
-        with open(evo['graph-filename']) as f:
-            graph_descr = f.readlines()
-    elif 'graph-adjlist' in evo:
-        graph_descr = evo['graph-adjlist']
-    else:
-        util.die(__package__, FileNotFoundError(
-            'Graph description not found (use -g or -G)'))
+    if args.aggregate is not None:
+        aggregate(args)
+        return
 
-    # generate graph
-    if args.edges:
-        graph = nx.parse_edgelist(graph_descr)
-    else:
-        graph = nx.parse_adjlist(graph_descr)
+    # read evolution file, choosing the reader from its extension
+    try:
+        if args.evolution_uid:
+            # evolution may be in its own file or in a container
+            evo, rounds = storage.find_evolution(args.evolution_dir,
+                    args.evolution_uid)
+        elif args.evolution_file.name != '<stdin>':
+            args.evolution_file.close()
+            evo, rounds = storage.load_evolution(args.evolution_file.name)
+        else:
+            evo, rounds = storage.read_evolution(args.evolution_file)
+    except (OSError, ValueError) as e:
+        util.die(__package__, e)
+    except KeyError as e:
+        util.die(__package__, KeyError('Rounds field not found: %s' % e))
 
-    # numeric conversion
-    if args.numeric != 'never':
-        subs = util.map_to_int(graph.nodes, args.numeric == 'always')
-        graph = nx.relabel_nodes(graph, subs)
+    graph, graph_path = load_graph_for(args, evo)
 
     if args.timeline:
-        print(Timeline(graph.nodes, evo['rounds']))
+        width = args.width
+        if width == 0:
+            width = shutil.get_terminal_size().columns
+        try:
+            Timeline(graph.labels, rounds, *args.rounds, width,
+                    Binning[args.binning]).print()
+        except OSError as e:
+            util.die(__package__, e)
 
     if args.animate:
-        Animation2D(graph, evo['rounds'], Layout[args.layout])
+        # matplotlib is imported only when needed
+        from .animation import Animation2D
+        # node positions are cached next to the compiled graph
+        cache_dir = os.path.join(os.path.dirname(graph_path), '.cache') \
+                if graph_path else None
+        try:
+            animation = Animation2D(graph.to_networkx(), rounds,
+                    Layout[args.layout], *args.rounds,
+                    show=not args.output, cache_dir=cache_dir)
+        except ValueError as e:
+            util.die(__package__, e)
+        if args.output:
+            try:
+                animation.save_as(args.output, args.fps)
+            except (OSError, ValueError, RuntimeError) as e:
+                util.die(__package__, e)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,243 @@
+import enum
+
+import numpy as np
+
+from ..node import State
+from ..rounds import iterate, state_array
+
+
+# quantile bands of epidemic curves, from the outer one
+_BANDS = ((.05, .95), (.25, .75))
+
+
+def _pad(curves: list) -> np.ndarray:
+    # ended evolutions keep their last state: pad curves with their last
+    # value, to the longest one
+    length = max(len(curve) for curve in curves)
+    return np.stack([np.pad(curve, (0, length - len(curve)), mode='edge')
+                     for curve in curves])
+
+
+def _draw_curves(aggregate, ax):
+    for probability in sorted(aggregate.curves, key=str):
+        curves = _pad(aggregate.curves[probability])
+        x = np.arange(curves.shape[1])
+        line, = ax.plot(x, np.median(curves, axis=0),
+                label='p=%s (%d runs)' % (probability, len(curves)))
+        for alpha, (low, high) in zip((.15, .3), _BANDS):
+            ax.fill_between(x, *np.quantile(curves, (low, high), axis=0),
+                    color=line.get_color(), alpha=alpha, linewidth=0)
+    ax.set_title('infectious nodes (median, 50% and 90% bands)')
+    ax.set_xlabel('round')
+    ax.legend(fontsize='small')
+
+
+def _draw_sizes(aggregate, ax):
+    sizes = {probability: np.array(sizes) for probability, sizes
+             in aggregate.final_sizes.items()}
+    everything = np.concatenate(list(sizes.values()))
+    span = int(everything.max() - everything.min()) + 1
+    # shared bins, at least one node wide
+    edges = np.histogram_bin_edges(everything, bins=min(span, 50),
+            range=(everything.min() - .5, everything.max() + .5))
+    for probability in sorted(sizes, key=str):
+        ax.hist(sizes[probability], bins=edges, histtype='step',
+                label='p=%s' % probability)
+    ax.set_title('final outbreak size')
+    ax.set_xlabel('infectious or recovered nodes on the last round')
+    ax.set_ylabel('runs')
+    ax.legend(fontsize='small')
+
+
+def _draw_heatmap(aggregate, ax):
+    density = aggregate.heatmap()
+    image = ax.imshow(density, aspect='auto', interpolation='nearest',
+            origin='lower', cmap='Reds', vmin=0)
+    ax.figure.colorbar(image, ax=ax)
+    ax.set_title('%s node share, over all runs' %
+            aggregate.state.name.lower())
+    ax.set_xlabel('round')
+    ax.set_ylabel('node bin' if aggregate.binned else 'node')
+
+
+class Plot(enum.Enum):
+
+    CURVES = {
+        'help': "Infectious nodes on each round: median and quantile bands, "
+                "one per infection probability.",
+        'draw': _draw_curves
+    }
+
+    SIZES = {
+        'help': "Histogram of final outbreak sizes, one per infection "
+                "probability.",
+        'draw': _draw_sizes
+    }
+
+    HEATMAP = {
+        'help': "Share of runs each node (or bin of nodes) is infectious in, "
+                "on each round; requires the graph.",
+        'draw': _draw_heatmap
+    }
+
+
+class Aggregate:
+
+    def __init__(self, labels: list = None, node_bins: int = 512,
+            state: State = State.INFECTIOUS):
+        """
+        Statistics of many evolutions, e.g. of a sweep, updated one evolution
+        at a time; see `add()`.
+
+        Only the epidemic curve and the final size of each evolution are
+        kept, never its rounds. With node labels, the heatmap is updated too,
+        in memory proportional to the number of node bins times the number
+        of rounds.
+
+        Parameters:
+            * labels (list|None): graph node labels, in heatmap order; if
+              None, there is no heatmap
+            * node_bins (int): maximum number of heatmap rows; if there are
+              more nodes, consecutive nodes are binned together
+            * state (State): node state shown by the heatmap
+
+        Attributes:
+            * curves (dict): infectious nodes on each round of each evolution
+              (list of numpy.ndarray), by infection probability
+            * final_sizes (dict): infectious or recovered nodes on the last
+              round of each evolution (list of int), by infection
+              probability; without immunity loss, this is the final outbreak
+              size
+            * evolutions (int): number of evolutions added
+            * state (State): node state shown by the heatmap
+            * binned (bool): whether heatmap rows are bins of nodes
+        """
+        self.curves = {}
+        self.final_sizes = {}
+        self.evolutions = 0
+        self.state = state
+        self.binned = False
+        self.__graph_uid = None
+        self.__index = None
+        if labels is not None:
+            self.__index = {label: k for k, label in enumerate(labels)}
+            bins = max(min(node_bins, len(labels)), 1)
+            self.binned = bins < len(labels)
+            self.__starts = np.arange(bins) * len(labels) // bins
+            self.__bin_sizes = np.diff(np.append(self.__starts, len(labels)))
+            # nodes in state on each round, summed over evolutions lasting
+            # longer than that round
+            self.__active = []
+            # nodes in state on the last round, summed over evolutions, by
+            # evolution length: they stay so until the longest one ends
+            self.__ended = []
+
+    def add(self, evo: dict, rounds):
+        """
+        Add an evolution, iterating over its rounds once.
+
+        Parameters:
+            * evo (dict): evolution fields, as returned by
+              `storage.load_evolution()`
+            * rounds (Sequence): evolution rounds
+
+        Raises:
+            * ValueError: if the heatmap is computed and evolutions spread
+              over different graphs
+        """
+        if self.__index is not None and 'graph-uid' in evo:
+            if self.__graph_uid is None:
+                self.__graph_uid = evo['graph-uid']
+            elif evo['graph-uid'] != self.__graph_uid:
+                raise ValueError("evolutions over different graphs can't be "
+                        "shown in the same heatmap")
+
+        code = self.state.value['code']
+        infectious, last, row = [], None, None
+        if self.__index is not None:
+            state = np.empty(len(self.__index), dtype=np.uint8)
+        for num, round_dict in enumerate(iterate(rounds)):
+            infectious.append(len(round_dict['i']))
+            last = round_dict
+            if self.__index is not None:
+                state_array(round_dict, self.__index, state)
+                row = np.add.reduceat(state == code, self.__starts)
+                _extend(self.__active, num + 1, len(self.__starts))
+                self.__active[num] += row
+        if last is None:
+            raise ValueError('Empty evolution')
+        if self.__index is not None:
+            _extend(self.__ended, len(infectious) + 1, len(self.__starts))
+            self.__ended[len(infectious)] += row
+
+        probability = evo.get('probability')
+        self.curves.setdefault(probability, []).append(
+                np.array(infectious, dtype=np.int32))
+        self.final_sizes.setdefault(probability, []).append(
+                len(last['i']) + len(last['r']))
+        self.evolutions += 1
+
+    def heatmap(self) -> np.ndarray:
+        """
+        Return the share of evolutions each node (or node bin) is in state
+        on each round, with shape (nodes or bins, rounds); evolutions
+        shorter than the longest one keep their last state.
+
+        Raises:
+            * ValueError: if no node labels were given
+        """
+        if self.__index is None:
+            raise ValueError('heatmap requires graph node labels')
+        rounds = len(self.__active)
+        if not rounds:
+            return np.zeros((len(self.__starts), 0))
+        active = np.stack(self.__active)
+        ended = np.cumsum(np.stack(self.__ended[:rounds]), axis=0)
+        return ((active + ended) /
+                (self.evolutions * self.__bin_sizes)).T
+
+    def plot(self, plots: list = None, show: bool = True):
+        """
+        Draw plots of the evolutions added, one above the other.
+
+        Parameters:
+            * plots (list|None): plots to draw (Plot); if None, draw all of
+              them, except the heatmap if there are no node labels
+            * show (bool): if True, show the plots in a window; else, no
+              window (nor display) is needed
+
+        Returns:
+            * matplotlib.figure.Figure: plots figure
+
+        Raises:
+            * ValueError: if there are no evolutions, or the heatmap has no
+              node labels
+        """
+        # matplotlib is imported only when plotting
+        import matplotlib.figure
+        import matplotlib.pyplot as plt
+
+        if not self.evolutions:
+            raise ValueError('No evolutions to plot')
+        if plots is None:
+            plots = [plot for plot in Plot if plot is not Plot.HEATMAP or
+                     self.__index is not None]
+        size = (12, 4 * len(plots))
+        if show:
+            fig, axes = plt.subplots(len(plots), squeeze=False, figsize=size)
+        else:
+            # not managed by pyplot: no GUI backend is involved
+            fig = matplotlib.figure.Figure(figsize=size)
+            axes = fig.subplots(len(plots), squeeze=False)
+        for plot, ax in zip(plots, axes[:, 0]):
+            plot.value['draw'](self, ax)
+        fig.tight_layout()
+        if show:
+            plt.show()
+        return fig
+
+
+def _extend(rows: list, length: int, width: int):
+    # append zero rows, up to length
+    while len(rows) < length:
+        rows.append(np.zeros(width, dtype=np.int64))
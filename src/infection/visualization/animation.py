@@ -1,9 +1,15 @@
-import matplotlib.pyplot as plt
+import os
+
 import matplotlib.animation as ani
+import matplotlib.colors
+import matplotlib.figure
+import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 
 from ..node import State
-from .layout import Layout
+from ..rounds import iterate, state_array
+from .layout import Layout, compute_layout
 
 
 _plot_settings = {
@@ -18,40 +24,119 @@ _plot_settings = {
         'width':          .8,       # edge width
 }
 
+# node colors, by state code
+_COLORS = np.array([matplotlib.colors.to_rgba(state.value['plt_col'])
+                    for state in sorted(State,
+                        key=lambda state: state.value['code'])])
+
+# video writers, by file extension; other extensions use ffmpeg
+_WRITERS = {
+        '.gif': 'pillow',
+}
+
+
+class _Frames:
+    # rounds to animate, replayed from the first one whenever the animation
+    # restarts; each frame is a round index and its node states
+
+    def __init__(self, rounds, index: dict, first: int, last: int):
+        self.rounds = rounds
+        self.index = index
+        self.first, self.last, _ = slice(first, last).indices(len(rounds))
+
+    def __len__(self):
+        return max(self.last - self.first, 0)
+
+    def __iter__(self):
+        state = np.empty(len(self.index), dtype=np.uint8)
+        round_iter = iterate(self.rounds, self.first, self.last)
+        for num, round_dict in enumerate(round_iter, self.first):
+            yield num, state_array(round_dict, self.index, state)
+
+
 class Animation2D:
 
     def __init__(self, graph: nx.Graph, rounds: list,
-                 layout: Layout = Layout.SPRING):
+                 layout: Layout = Layout.SPRING, first: int = 0,
+                 last: int = None, show: bool = True, cache_dir: str = None):
+        """
+        Animated plot of an evolution over a graph.
+
+        Nodes and edges are drawn once; each frame only updates node colors,
+        from the node states of a round, and redraws nodes only (blitting).
+
+        Parameters:
+            * graph (networkx.Graph): network the infection spreads over
+            * rounds (Sequence): evolution rounds
+            * layout (Layout): node positioning algorithm
+            * first (int): first round (included)
+            * last (int|None): last round (excluded); if None, animate rounds
+              up to the last one
+            * show (bool): if True, show the animation in a window; else,
+              no window (nor display) is needed, see `save_as()`
+            * cache_dir (str|None): directory of cached node positions, see
+              `compute_layout()`
+
+        Attributes:
+            * graph (networkx.Graph): network the infection spreads over
+            * rounds (Sequence): evolution rounds
+            * layout (dict): node positions
+            * fig (matplotlib.figure.Figure): animation figure
+            * ax (matplotlib.axes.Axes): animation axes
+            * animation (matplotlib.animation.FuncAnimation): animation
+        """
         self.graph = graph
         self.rounds = rounds
-        self.layout = layout.value['func'](self.graph)
+        self.layout = compute_layout(self.graph, layout, cache_dir)
+
+        if show:
+            self.fig, self.ax = plt.subplots(figsize=(12, 8))
+        else:
+            # not managed by pyplot: no GUI backend is involved
+            self.fig = matplotlib.figure.Figure(figsize=(12, 8))
+            self.ax = self.fig.subplots()
 
-        self.fig, self.ax = plt.subplots(figsize=(12, 8))
+        # static artists: edges, and nodes with their borders
+        nx.draw_networkx_edges(self.graph, self.layout, ax=self.ax,
+                edge_color=_plot_settings['edge_color'],
+                width=_plot_settings['width'])
+        self.__nodes = nx.draw_networkx_nodes(self.graph, self.layout,
+                ax=self.ax, node_color=[_COLORS[0]] * len(self.graph),
+                node_shape=_plot_settings['node_shape'],
+                node_size=_plot_settings['node_size'],
+                linewidths=_plot_settings['linewidths'],
+                edgecolors=_plot_settings['edgecolors'])
+        self.ax.set_axis_off()
+        # blitting redraws the axes area only, so the round number can't be
+        # the axes title
+        self.__title = self.ax.text(0.01, 0.99, '',
+                transform=self.ax.transAxes, ha='left', va='top',
+                fontsize='large')
+
+        index = {node: k for k, node in enumerate(self.graph)}
         self.animation = ani.FuncAnimation(self.fig, self.__update__,
-                frames=len(self.rounds))
-
-        plt.show()
-
-    def __update__(self, num):
-        # node colors
-        infectious = self.rounds[num]['i']
-        recovered = self.rounds[num]['r']
-        colors = []
-        for node in self.graph:
-            if node in infectious:
-                state = State.INFECTIOUS
-            elif node in recovered:
-                state = State.RECOVERED
-            else:
-                state = State.SUSCEPTIBLE
-            colors.append(state.value['plt_col'])
-
-        # plot
-        self.ax.clear()
-        nx.draw(self.graph, ax=self.ax, pos=self.layout, node_color=colors,
-                **_plot_settings)
-
-        self.ax.set_title("round %d" % num)
-
-    def save_as(self, filename: str):
-        self.animation.save(filename, writer='imagemagick')
+                frames=_Frames(self.rounds, index, first, last),
+                init_func=lambda: [self.__nodes, self.__title], blit=True)
+
+        if show:
+            plt.show()
+
+    def __update__(self, frame):
+        num, state = frame
+        self.__nodes.set_facecolor(_COLORS[state])
+        self.__title.set_text("round %d" % num)
+        return [self.__nodes, self.__title]
+
+    def save_as(self, filename: str, fps: int = 5):
+        """
+        Encode the animation to a video or image file, frame by frame; the
+        writer is chosen from the file extension ('.gif' files use Pillow,
+        other ones ffmpeg).
+
+        Parameters:
+            * filename (str): output file path
+            * fps (int): frames per second
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        self.animation.save(filename, writer=_WRITERS.get(ext, 'ffmpeg'),
+                fps=fps)
@@ -1,10 +1,153 @@
 import enum
+import os
 
 import networkx as nx
+import numpy as np
+
+from .. import storage
+from .. import util
+from ..csr import CSRGraph
+
+
+def _rescale(pos: np.ndarray) -> np.ndarray:
+    # fit positions into [-1, 1], as networkx layouts do
+    pos = pos - pos.mean(axis=0)
+    lim = np.abs(pos).max() if pos.size else 0
+    return pos / lim if lim > 0 else pos
+
+
+def _numbering(labels: list) -> np.ndarray:
+    # node numbers, by node index: labels themselves if they are 0..n-1 (in
+    # any order, e.g. as read from a graph file), else graph order
+    nodes = len(labels)
+    try:
+        number = np.array([int(label) for label in labels], dtype=np.int64)
+        if np.array_equal(np.sort(number), np.arange(nodes)):
+            return number
+    except (TypeError, ValueError):
+        pass
+    return np.arange(nodes, dtype=np.int64)
+
+
+def _cycle_layout(graph: nx.Graph) -> dict:
+    # nodes evenly spaced on a circle, by node number: a CYCLE graph becomes
+    # a regular polygon
+    angle = 2 * np.pi * _numbering(list(graph)) / max(len(graph), 1)
+    pos = np.stack((np.cos(angle), np.sin(angle)), axis=1)
+    return dict(zip(graph, pos))
+
+
+def _torus_rows(nodes: int, heads: np.ndarray, tails: np.ndarray) -> int:
+    # number of rows of a TORUS graph, given its edges, whose node k is in
+    # column k // rows and row k % rows; extra edges (e.g.
+    # TORUS_U_ERDOS_RENYI) are allowed
+    keys = np.sort(heads * nodes + tails)
+    k = np.arange(nodes, dtype=np.int64)
+
+    def has_edges(u, v):
+        if not len(keys):
+            return not len(u)
+        found = np.searchsorted(keys, u * nodes + v)
+        return bool(np.all(keys[np.minimum(found, len(keys) - 1)] ==
+                           u * nodes + v))
+
+    matches = []
+    for rows in range(1, nodes + 1):
+        if nodes % rows:
+            continue
+        columns = nodes // rows
+        col, row = k // rows, k % rows
+        # next node along each axis, wrapping only if longer than two nodes
+        down = (row < rows - 1) | (rows > 2)
+        right = (col < columns - 1) | (columns > 2)
+        if has_edges(k[down], col[down] * rows + (row[down] + 1) % rows) \
+                and has_edges(k[right],
+                    ((col[right] + 1) % columns) * rows + row[right]):
+            matches.append(rows)
+    if not matches:
+        raise ValueError('graph is not a torus')
+    # the most square shape
+    return min(matches, key=lambda rows: abs(rows - nodes / rows))
+
+
+def _torus_layout(graph: nx.Graph) -> dict:
+    # nodes on a grid, by node number, columns and rows as in a TORUS graph
+    csr = CSRGraph.from_networkx(graph)
+    nodes = len(csr)
+    number = _numbering(csr.labels)
+    heads = np.repeat(number, csr.degree())
+    rows = _torus_rows(nodes, heads, number[csr.indices]) if nodes else 1
+    pos = np.stack((number // rows, -(number % rows)), axis=1)
+    return dict(zip(graph, _rescale(pos.astype(np.float64))))
+
+
+def _force_layout(graph: nx.Graph, iterations: int = 100,
+        grid: int = 16, seed: int = 0) -> dict:
+    # Fruchterman-Reingold forces, with repulsion approximated on a grid:
+    # nodes are attracted by their neighbors, and repelled by the center of
+    # mass of each grid cell, weighted by its node count. Repulsion is
+    # computed at grid corners only, and interpolated at nodes, so each
+    # iteration takes O(nodes + edges + grid^4) time, instead of O(nodes^2).
+    csr = CSRGraph.from_networkx(graph)
+    nodes = len(csr)
+    if nodes < 3:
+        return _cycle_layout(graph)
+    rng = np.random.default_rng(seed)
+    heads = np.repeat(np.arange(nodes), csr.degree())
+    tails = csr.indices
+    pos = rng.random((nodes, 2))
+    # optimal distance between nodes in the unit square
+    k = 1 / np.sqrt(nodes)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    corners = np.stack(np.meshgrid(np.arange(grid + 1), np.arange(grid + 1),
+            indexing='ij'), axis=2).reshape(-1, 2)
+
+    for _ in range(iterations):
+        disp = np.zeros_like(pos)
+        # attraction: d^2 / k along edges
+        delta = pos[heads] - pos[tails]
+        dist = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+        for axis in (0, 1):
+            disp[:, axis] -= np.bincount(heads,
+                    weights=delta[:, axis] * dist / k, minlength=nodes)
+        # repulsion: k^2 / d from each cell's center of mass, softened
+        # within a cell
+        low, high = pos.min(axis=0), pos.max(axis=0)
+        size = np.maximum(high - low, 1e-9) / grid
+        scaled = np.minimum((pos - low) / size, grid - 1e-9)
+        cell = scaled.astype(np.int64)
+        cell_id = cell[:, 0] * grid + cell[:, 1]
+        mass = np.bincount(cell_id, minlength=grid**2).astype(np.float64)
+        center = np.stack([np.bincount(cell_id, weights=pos[:, axis],
+                minlength=grid**2) for axis in (0, 1)], axis=1)
+        full = mass > 0
+        center, mass = center[full] / mass[full, None], mass[full]
+        delta = (low + corners * size)[:, None, :] - center[None, :, :]
+        dist2 = (delta**2).sum(axis=2) + (size**2).sum()
+        field = (delta * (k**2 * mass / dist2)[:, :, None]).sum(axis=1)
+        field = field.reshape(grid + 1, grid + 1, 2)
+        # bilinear interpolation between the corners of each node's cell
+        fx, fy = (scaled - cell).T
+        i, j = cell.T
+        disp += (field[i, j] * ((1 - fx) * (1 - fy))[:, None] +
+                 field[i + 1, j] * (fx * (1 - fy))[:, None] +
+                 field[i, j + 1] * ((1 - fx) * fy)[:, None] +
+                 field[i + 1, j + 1] * (fx * fy)[:, None])
+        # move, no farther than temperature
+        length = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-9)
+        pos += disp / length[:, None] * np.minimum(length,
+                temperature)[:, None]
+        temperature -= cooling
+
+    return dict(zip(graph, _rescale(pos)))
+
 
 class Layout(enum.Enum):
 
     CIRCULAR        = {'func': nx.circular_layout}
+    CYCLE           = {'func': _cycle_layout}
+    FORCE           = {'func': _force_layout}
     KAMADA_KAWAI    = {'func': nx.kamada_kawai_layout}
     PLANAR          = {'func': nx.planar_layout}
     RANDOM          = {'func': nx.random_layout}
@@ -12,3 +155,53 @@ class Layout(enum.Enum):
     SPECTRAL        = {'func': nx.spectral_layout}
     SPIRAL          = {'func': nx.spiral_layout}
     SPRING          = {'func': nx.spring_layout}
+    TORUS           = {'func': _torus_layout}
+
+
+def compute_layout(graph: nx.Graph, layout: Layout = Layout.SPRING,
+        cache_dir: str = None) -> dict:
+    """
+    Return node positions; positions are cached on disk, by graph name
+    (i.e. graph UID) and layout, so that they are computed once per graph.
+
+    Parameters:
+        * graph (networkx.Graph): graph to lay out
+        * layout (Layout): node positioning algorithm
+        * cache_dir (str|None): directory of cached positions; if None, or if
+          graph has no name, positions are not cached
+
+    Returns:
+        * dict: node positions, by node label
+
+    Raises:
+        * ValueError: if layout can't be applied to graph (e.g. TORUS layout
+          of a graph which is not a torus)
+    """
+    labels = [str(node) for node in graph]
+    cache_path = None
+    if cache_dir is not None and graph.name:
+        cache_path = os.path.join(cache_dir,
+                '%s.%s.layout' % (graph.name, layout.name))
+        try:
+            meta, arrays = storage.map_arrays(cache_path)
+            if meta['labels'] == labels:
+                return dict(zip(graph, np.array(arrays['positions'])))
+        except (OSError, ValueError, KeyError):
+            # missing or corrupted cache
+            pass
+
+    pos = layout.value['func'](graph)
+
+    # caching is best effort: graph directory may be read-only
+    if cache_path is not None:
+        try:
+            util.make_dir_check_writable(cache_dir)
+            tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+            storage.write_arrays(tmp_path, {'labels': labels}, {
+                'positions': np.array([pos[node] for node in graph],
+                    dtype=np.float64).reshape(-1, 2)
+            })
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return pos
@@ -1,23 +1,113 @@
+import enum
 import math
+import sys
 
+import numpy as np
+
+from ..rounds import iterate, state_array
 from ..node import State
 
 
+# node states, by state code
+_STATES = sorted(State, key=lambda state: state.value['code'])
+
+
+# state codes, by increasing priority, and priority of each state code
+_BY_PRIORITY = np.array([State.SUSCEPTIBLE.value['code'],
+                         State.RECOVERED.value['code'],
+                         State.INFECTIOUS.value['code']], dtype=np.uint8)
+_PRIORITY = np.argsort(_BY_PRIORITY).astype(np.uint8)
+
+
+def _reduce_priority(state: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # infectious beats recovered, which beats susceptible
+    rank = _PRIORITY[state]
+    return _BY_PRIORITY[np.maximum.reduceat(rank, starts)]
+
+
+def _reduce_majority(state: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # most frequent state; ties are broken by priority
+    counts = np.stack([np.add.reduceat(state == code, starts)
+                       for code in _BY_PRIORITY[::-1]], axis=1)
+    return _BY_PRIORITY[::-1][np.argmax(counts, axis=1)]
+
+
+class Binning(enum.Enum):
+
+    PRIORITY = {
+        'help': "Show the most relevant state in each bin: infectious, then "
+                "recovered, then susceptible.",
+        'reduce': _reduce_priority
+    }
+
+    MAJORITY = {
+        'help': "Show the most frequent state in each bin.",
+        'reduce': _reduce_majority
+    }
+
+
 class Timeline:
 
-    def __init__(self, nodes, rounds) -> None:
-        self.lines = []
-        prefix_width = math.ceil(math.log10(len(rounds) + 1))
-        for round_idx, round_dict in enumerate(rounds):
-            line_lst = ['[%*d] ' % (prefix_width, round_idx)]
-            for label in nodes:
-                if label in round_dict['i']:
-                    line_lst.append(State.INFECTIOUS.value['cli_str'])
-                elif label in round_dict['r']:
-                    line_lst.append(State.RECOVERED.value['cli_str'])
-                else:
-                    line_lst.append(State.SUSCEPTIBLE.value['cli_str'])
-            self.lines.append(''.join(line_lst))
+    def __init__(self, nodes, rounds, first: int = 0, last: int = None,
+            width: int = None, binning: Binning = Binning.PRIORITY) -> None:
+        """
+        Terminal timeline: one line per round, one colored character per
+        node (or per bin of nodes).
+
+        Each round is converted to an array of node states once, and lines
+        are rendered one at a time, while iterating over the timeline; so,
+        time is linear in the evolution size, and memory in the graph size.
+
+        Parameters:
+            * nodes (list): node labels, in display order
+            * rounds (Sequence): evolution rounds
+            * first (int): first round (included)
+            * last (int|None): last round (excluded); if None, show rounds
+              up to the last one
+            * width (int|None): maximum line width, including the round
+              number; if the nodes don't fit, consecutive nodes are binned
+              into one character each. If None, nodes are never binned
+            * binning (Binning): how the state of a bin is chosen
+        """
+        self.__nodes = nodes
+        self.__index = {label: k for k, label in enumerate(nodes)}
+        self.__rounds = rounds
+        self.__first, self.__last, _ = \
+                slice(first, last).indices(len(rounds))
+        self.__prefix_width = math.ceil(math.log10(len(rounds) + 1))
+        self.__binning = binning
+
+        # bins are consecutive slices of nodes
+        columns = len(nodes)
+        if width is not None:
+            columns = max(min(columns, width - self.__prefix_width - 3), 1)
+        self.__starts = None
+        if columns < len(nodes):
+            self.__starts = np.arange(columns) * len(nodes) // columns
+
+    def __iter__(self):
+        """Render lines, one round at a time."""
+        chars = np.array([state.value['cli_str'] for state in _STATES],
+                dtype=object)
+        state = np.empty(len(self.__nodes), dtype=np.uint8)
+        round_iter = iterate(self.__rounds, self.__first, self.__last)
+        for round_idx, round_dict in enumerate(round_iter, self.__first):
+            state_array(round_dict, self.__index, state)
+            shown = state if self.__starts is None else \
+                    self.__binning.value['reduce'](state, self.__starts)
+            yield '[%*d] ' % (self.__prefix_width, round_idx) + \
+                    ''.join(chars[shown])
+
+    def print(self, file=None):
+        """
+        Write lines to a text file as they are rendered.
+
+        Parameters:
+            * file (file|None): text file; if None, use standard output
+        """
+        file = sys.stdout if file is None else file
+        for line in self:
+            file.write(line + '\n')
 
     def __str__(self):
-        return '\n'.join(self.lines)
+        return '\n'.join(self)
@@ -0,0 +1,158 @@
+"""
+Equivalence of the simulation engines with the reference `Evolution`.
+
+With infection probability 1, an evolution is deterministic: every
+susceptible neighbor of an infectious node is infected, so nodes are
+infected in order of distance from the zeroes, and recovered nodes become
+susceptible again behind the front. So all the engines must compute the
+same rounds, round for round, whatever their data structures and random
+draws; and percolation must reach the same final outbreak as a one-round
+infection without immunity loss.
+"""
+
+import itertools
+import unittest
+
+import networkx as nx
+
+from infection.generation import Factory
+from infection.simulation import BatchEvolution, Engine, Evolution
+from infection.simulation import Percolation
+
+
+# model variants: infection and recovery duration
+VARIANTS = {
+    'SIR': (1, None),
+    'SIRS': (1, 2),
+    'LONG-INFECTION': (3, None),
+    'LONG-SIRS': (2, 3)
+}
+
+# rounds computed at most, not to hang on a broken engine
+MAX_ROUNDS = 500
+
+SEED = 7
+
+
+def make_graphs() -> dict:
+    """
+    Return small networkx graphs by name, with integer and string labels;
+    the random ones are seeded.
+    """
+    factory = Factory()
+    template = Factory.Template
+    graphs = {
+        'cycle': factory.build(template.CYCLE, nodes=40),
+        'torus': factory.build(template.TORUS, columns=7, rows=6),
+        'torus-er': factory.build_csr(template.TORUS_U_ERDOS_RENYI, SEED,
+                columns=10, rows=10, probability=.02).to_networkx(),
+        'matching': factory.build_csr(template.CYCLE_U_MATCHING, SEED,
+                nodes=60).to_networkx()
+    }
+    # string labels, in another order than the numbers
+    graphs['torus-str'] = nx.relabel_nodes(graphs['torus'],
+            {node: 'n%d' % node for node in graphs['torus']})
+    return graphs
+
+
+def zeroes_of(graph) -> list:
+    """Return initially infectious nodes, spread over the graph."""
+    return [*graph][::len(graph) // 3][:3]
+
+
+def rounds_of(evolution) -> list:
+    """
+    Return the rounds of a lazy evolution, as sets of infectious and
+    recovered nodes, up to `MAX_ROUNDS` rounds.
+    """
+    infectious, recovered = set(evolution.zeroes), set()
+    rounds = [(frozenset(infectious), frozenset())]
+    for infected, new_recovered, susceptible in itertools.islice(
+            evolution.transitions(), MAX_ROUNDS):
+        infectious.update(infected)
+        infectious.difference_update(new_recovered)
+        recovered.update(new_recovered)
+        recovered.difference_update(susceptible)
+        rounds.append((frozenset(infectious), frozenset(recovered)))
+    return rounds
+
+
+def as_sets(rounds) -> list:
+    """Return rounds as sets of infectious and recovered nodes."""
+    return [(frozenset(r['i']), frozenset(r['r'])) for r in rounds]
+
+
+class EngineEquivalence(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graphs = make_graphs()
+
+    def reference(self, graph, variant: str) -> list:
+        infection, recovery = VARIANTS[variant]
+        return rounds_of(Evolution(graph, zeroes_of(graph), 1., infection,
+                recovery, SEED, lazy=True))
+
+    def test_engines(self):
+        for (name, graph), variant, engine in itertools.product(
+                self.graphs.items(), VARIANTS, Engine):
+            with self.subTest(graph=name, variant=variant,
+                    engine=engine.name):
+                infection, recovery = VARIANTS[variant]
+                evolution = engine.value['class'](graph, zeroes_of(graph),
+                        1., infection, recovery, SEED, lazy=True)
+                self.assertEqual(rounds_of(evolution),
+                        self.reference(graph, variant))
+
+    def test_recorded_rounds(self):
+        # rounds recorded by the engines, through keyframes and deltas
+        for (name, graph), variant, engine in itertools.product(
+                self.graphs.items(), VARIANTS, Engine):
+            expected = self.reference(graph, variant)
+            with self.subTest(graph=name, variant=variant,
+                    engine=engine.name):
+                infection, recovery = VARIANTS[variant]
+                evolution = engine.value['class'](graph, zeroes_of(graph),
+                        1., infection, recovery, SEED)
+                self.assertEqual(as_sets(evolution.rounds), expected)
+
+    def test_summaries(self):
+        for (name, graph), variant, engine in itertools.product(
+                self.graphs.items(), VARIANTS, Engine):
+            expected = self.reference(graph, variant)
+            with self.subTest(graph=name, variant=variant,
+                    engine=engine.name):
+                infection, recovery = VARIANTS[variant]
+                summary = engine.value['class'](graph, zeroes_of(graph),
+                        1., infection, recovery, SEED, summary=True).summary
+                self.assertEqual(summary.counts.tolist(),
+                        [[len(graph) - len(i) - len(r), len(i), len(r)]
+                         for i, r in expected])
+
+    def test_batch(self):
+        for (name, graph), variant in itertools.product(
+                self.graphs.items(), VARIANTS):
+            expected = self.reference(graph, variant)
+            with self.subTest(graph=name, variant=variant):
+                infection, recovery = VARIANTS[variant]
+                # replicas with the same zeroes, and with none
+                batch = BatchEvolution(graph, [zeroes_of(graph)] * 2 + [[]],
+                        1., infection, recovery, seed=SEED)
+                for rounds in batch.rounds[:2]:
+                    self.assertEqual(as_sets(rounds), expected)
+                self.assertEqual(len(batch.rounds[2]), 1)
+
+    def test_percolation(self):
+        for name, graph in self.graphs.items():
+            with self.subTest(graph=name):
+                zeroes = zeroes_of(graph)
+                final_infectious, final_recovered = \
+                    self.reference(graph, 'SIR')[-1]
+                self.assertFalse(final_infectious)
+                percolation = Percolation(graph, zeroes, [0., 1.], SEED)
+                self.assertEqual(percolation.sizes.tolist(),
+                        [len(zeroes), len(final_recovered)])
+
+
+if __name__ == "__main__":
+    unittest.main()